@@ -28,11 +28,425 @@ Output:
 
 # Answer
 
+import math
+import mmap
+import os
+import struct
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# Numbers covered by one segment of the segmented sieve. Only odd numbers are stored,
+# one byte each, so a segment takes SEGMENT_SIZE // 2 bytes however large a and b are.
+SEGMENT_SIZE = 1 << 21
+
+# Sieve of Eratosthenes over the odd numbers up to limit: index i of the returned
+# bool array stands for 2*i + 1
+def odd_sieve(limit):
+    sieve = np.ones((limit + 1) // 2, dtype=bool)
+    if len(sieve):
+        sieve[0] = False  # 1 is not prime
+    for i in range(1, (math.isqrt(limit) - 1) // 2 + 1):
+        if sieve[i]:
+            p = 2 * i + 1
+            sieve[p * p // 2::p] = False
+    return sieve
+
+# All primes up to limit
+def simple_sieve(limit):
+    if limit < 2:
+        return np.zeros(0, dtype=np.int64)
+    return np.concatenate(([2], 2 * np.flatnonzero(odd_sieve(limit)) + 1)).astype(np.int64)
+
+# Prime cache file: a fixed header followed by the odd-number bitset.
+# Header fields: magic, version, unused, and the limit the bitset covers.
+CACHE_MAGIC = b"PRIMEBIT"
+CACHE_VERSION = 1
+CACHE_HEADER = struct.Struct("<8sIIQ")
+
+# Primes up to some limit, kept as a bitset with one bit per odd number (bit i of the
+# little-endian bitset stands for 2*i + 1), so the primes below 10**9 take 62.5 MB.
+# Asking for more than the cache holds sieves again up to at least twice the old
+# limit, so growing step by step costs O(final limit) in total.
+class PrimeCache:
+    def __init__(self, bits=None, limit=1):
+        self.bits = np.zeros(1, dtype=np.uint8) if bits is None else bits
+        self.limit = limit
+        # Primes up to `listed`, unpacked from the bitset as they are asked for
+        self.prime_list = np.zeros(0, dtype=np.int64)
+        self.listed = 0
+
+    # Make sure every number up to limit is covered
+    def ensure(self, limit):
+        if limit > self.limit:
+            self.limit = max(limit, 2 * self.limit)
+            self.bits = np.packbits(odd_sieve(self.limit), bitorder="little")
+
+    # All primes up to limit as an int64 array
+    def primes(self, limit):
+        self.ensure(limit)
+        if limit > self.listed:
+            odd = np.unpackbits(self.bits, count=(limit + 1) // 2, bitorder="little")
+            self.prime_list = np.concatenate(([2], 2 * np.flatnonzero(odd) + 1)).astype(np.int64)
+            self.listed = limit
+        return self.prime_list[:np.searchsorted(self.prime_list, limit, side="right")]
+
+    # Primality of n with one bit lookup, growing the cache up to n if needed
+    def is_prime(self, n):
+        if n < 2:
+            return False
+        self.ensure(n)
+        if n % 2 == 0:
+            return n == 2
+        i = n // 2
+        return bool(self.bits[i >> 3] >> (i & 7) & 1)
+
+    # is_prime over an array of integers between 0 and limit
+    def is_prime_array(self, values):
+        i = values // 2
+        odd = (self.bits[i >> 3] >> (i & 7) & 1).astype(bool)
+        return np.where(values % 2 == 1, odd, values == 2)
+
+    # Take over the numbers covered by another cache, so that everything holding a
+    # reference to this one sees them
+    def replace(self, other):
+        self.bits, self.limit = other.bits, other.limit
+        self.prime_list, self.listed = other.prime_list, other.listed
+
+    # Write the cache to path. The file is written under a temporary name in the same
+    # directory and then renamed over path, so processes that have the old file mapped
+    # keep their pages and a process opening path never sees a partial file.
+    def save(self, path):
+        fd, temporary = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)),
+                                         prefix=os.path.basename(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(CACHE_HEADER.pack(CACHE_MAGIC, CACHE_VERSION, 0, self.limit))
+                f.write(self.bits.tobytes())
+            os.replace(temporary, path)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+
+    # Open a cache written by save(). The bitset is a read-only view of a memory map of
+    # the file, so opening is instant and every process on the host shares the pages.
+    @classmethod
+    def open(cls, path):
+        with open(path, "rb") as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(data) < CACHE_HEADER.size or data[:len(CACHE_MAGIC)] != CACHE_MAGIC:
+            raise ValueError(f"{path}: not a prime cache file")
+        _, version, _, limit = CACHE_HEADER.unpack(data[:CACHE_HEADER.size])
+        if version != CACHE_VERSION:
+            raise ValueError(f"{path}: unsupported prime cache version {version}")
+        bits = np.frombuffer(data, dtype=np.uint8, offset=CACHE_HEADER.size)
+        if len(bits) * 8 < (limit + 1) // 2:
+            raise ValueError(f"{path}: prime cache file is truncated")
+        return cls(bits, limit)
+
+# The cache shared by everything in this process
+prime_cache = PrimeCache()
+
+# Use the cache file at path for this process, covering at least limit. The file is
+# created, or rewritten if it covers less, so the sieve runs once per host. prime_cache
+# stays the same object and takes over the file's contents, so modules that imported
+# it use the file as well.
+def use_prime_cache(path, limit=0):
+    cache = PrimeCache.open(path) if os.path.exists(path) else PrimeCache()
+    if cache.limit < limit:
+        cache.ensure(limit)
+        cache.save(path)
+    prime_cache.replace(cache)
+    return prime_cache
+
+# Primes in [low, high) for odd low, crossing off the multiples of the odd base primes.
+# base_primes must contain every odd prime up to sqrt(high).
+def sieve_segment(low, high, base_primes):
+    sieve = np.ones((high - low + 1) // 2, dtype=bool)
+    for p in base_primes.tolist():
+        if p * p >= high:
+            break
+        # First odd multiple of p in the segment, never below p*p
+        start = max(p * p, (low + p - 1) // p * p)
+        if start % 2 == 0:
+            start += p
+        sieve[(start - low) // 2::p] = False
+    if low == 1:
+        sieve[0] = False
+    return low + 2 * np.flatnonzero(sieve).astype(np.int64)
+
+# Primes in [a, b] as NumPy arrays, one segment at a time, in increasing order.
+# Memory stays at one segment plus the base primes up to sqrt(b), so ranges far
+# beyond what fits in memory (b up to around 10**12) can be enumerated.
+def prime_segments(a, b, segment_size=SEGMENT_SIZE):
+    a = max(a, 2)
+    if a > b:
+        return
+    if a == 2:
+        yield np.array([2], dtype=np.int64)
+        a = 3
+    base_primes = prime_cache.primes(math.isqrt(b))[1:]  # The odd ones
+    segment_size += segment_size % 2
+    low = a | 1
+    while low <= b:
+        high = min(low + segment_size, b + 1)
+        primes = sieve_segment(low, high, base_primes)
+        if len(primes):
+            yield primes
+        low += segment_size
+
+# All primes in [a, b] (both inclusive) as one sorted int64 array
+def primes_in_range(a, b, segment_size=SEGMENT_SIZE):
+    segments = list(prime_segments(a, b, segment_size))
+    if not segments:
+        return np.zeros(0, dtype=np.int64)
+    return np.concatenate(segments)
+
+# The primes in [a, b] one by one, without ever holding more than one segment
+def iter_primes_in_range(a, b, segment_size=SEGMENT_SIZE):
+    for primes in prime_segments(a, b, segment_size):
+        yield from primes.tolist()
+
 def print_primes_in_range(A, B):
-    for i in range(A, B + 1):
-        count = 0
-        for j in range(1, i + 1):
-            if i % j == 0:
-                count += 1
-        if count == 2:
-            print(i, end=" ")
+    # Same output as before: every prime followed by a space, but written a segment at a time
+    for primes in prime_segments(A, B):
+        print(" ".join(map(str, primes.tolist())), end=" ")
+
+# Numbers sieved by one task of the parallel sieve: several segments, so the cost of
+# sending a task to a worker is small next to the sieving itself
+TASK_SIZE = 16 * SEGMENT_SIZE
+
+# Base primes shared with the current worker process, set once by init_worker
+worker_base_primes = None
+
+def init_worker(base_primes):
+    global worker_base_primes
+    worker_base_primes = base_primes
+
+# Sieve [low, high) for odd low inside a worker, segment by segment. With text=True the
+# primes come back as the lines of a file, so the formatting also runs in the workers.
+def sieve_task(low, high, text):
+    segments = [sieve_segment(start, min(start + SEGMENT_SIZE, high), worker_base_primes)
+                for start in range(low, high, SEGMENT_SIZE)]
+    primes = np.concatenate(segments)
+    if text:
+        return "".join(f"{p}\n" for p in primes.tolist()).encode()
+    return primes
+
+# Run sieve_task over [a, b] in a process pool and yield the results in order. The base
+# primes are sent to every worker once, and only a bounded number of tasks is in flight,
+# so memory stays flat however wide the range is.
+def parallel_tasks(a, b, workers, text):
+    a = max(a, 2)
+    if a > b:
+        return
+    if a == 2:
+        yield b"2\n" if text else np.array([2], dtype=np.int64)
+        a = 3
+    workers = workers or os.cpu_count()
+    base_primes = prime_cache.primes(math.isqrt(b))[1:]
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                             initargs=(base_primes,)) as executor:
+        pending = deque()
+        for low in range(a | 1, b + 1, TASK_SIZE):
+            pending.append(executor.submit(sieve_task, low, min(low + TASK_SIZE, b + 1), text))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+# The primes in [a, b] as NumPy arrays in increasing order, like prime_segments,
+# but sieved in parallel by `workers` processes (all cores by default)
+def parallel_primes_in_range(a, b, workers=None):
+    for primes in parallel_tasks(a, b, workers, text=False):
+        if len(primes):
+            yield primes
+
+# Write the primes in [a, b] to the file at path, one per line, sieving in parallel.
+# Returns how many primes were written.
+def write_primes_in_range(a, b, path, workers=None):
+    count = 0
+    with open(path, "wb") as file:
+        for lines in parallel_tasks(a, b, workers, text=True):
+            file.write(lines)
+            count += lines.count(b"\n")
+    return count
+
+
+# Primes below SMALL_LIMIT, tried before Miller-Rabin. Every composite below
+# SMALL_LIMIT**2 has one of them as a factor, so those need no further test.
+SMALL_LIMIT = 1000
+SMALL_PRIMES = simple_sieve(SMALL_LIMIT).tolist()
+SMALL_PRIMES_PRODUCT = math.prod(SMALL_PRIMES)
+
+# The first twelve primes as Miller-Rabin bases give the right answer for every
+# n < 3.1 * 10**23, which covers all 64-bit integers
+MILLER_RABIN_BASES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37)
+
+# Strong probable-prime test of odd n > 2 to every base
+def miller_rabin(n, bases=MILLER_RABIN_BASES):
+    # n - 1 = d * 2**s with d odd
+    s = ((n - 1) & (1 - n)).bit_length() - 1
+    d = (n - 1) >> s
+    for a in bases:
+        x = pow(a, d, n)
+        if x == 1 or x == n - 1:
+            continue
+        for _ in range(s - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+# Deterministic primality test for any n < 3.1 * 10**23 (all 64-bit integers).
+# Larger n get the same test, which is then a very strong probable-prime check.
+def is_prime(n):
+    if n < 2:
+        return False
+    if n <= prime_cache.limit:
+        return prime_cache.is_prime(n)
+    # One gcd against the product of the small primes instead of a division each
+    if math.gcd(n, SMALL_PRIMES_PRODUCT) != 1:
+        return n <= SMALL_LIMIT and n in SMALL_PRIMES
+    if n < SMALL_LIMIT * SMALL_LIMIT:
+        return True
+    return miller_rabin(n)
+
+# 64x64 -> 128-bit products of uint64 arrays as (high, low) words, from 32-bit halves
+LOW32 = np.uint64(0xFFFFFFFF)
+SHIFT32 = np.uint64(32)
+
+def multiply_wide(a, b):
+    a0, a1 = a & LOW32, a >> SHIFT32
+    b0, b1 = b & LOW32, b >> SHIFT32
+    low_low, low_high, high_low = a0 * b0, a0 * b1, a1 * b0
+    middle = (low_low >> SHIFT32) + (low_high & LOW32) + (high_low & LOW32)
+    high = a1 * b1 + (low_high >> SHIFT32) + (high_low >> SHIFT32) + (middle >> SHIFT32)
+    return high, a * b  # uint64 multiplication wraps, which is exactly the low word
+
+# Montgomery multiplication a * b / 2**64 mod n for arrays of odd moduli n, where
+# n_inverse = -1/n mod 2**64. No 128-bit division is needed, only shifts and products.
+def montgomery_multiply(a, b, n, n_inverse):
+    high, low = multiply_wide(a, b)
+    m = low * n_inverse
+    reduce_high, _ = multiply_wide(m, n)
+    # low + low(m * n) is 0 or 2**64, so it carries exactly when low != 0
+    t = high + reduce_high
+    overflow = t < high
+    carried = t + (low != 0)
+    overflow |= carried < t
+    return np.where(overflow | (carried >= n), carried - n, carried)
+
+# (a + b) mod n for a, b < n without overflowing
+def add_mod(a, b, n):
+    total = a + b
+    return np.where((total < a) | (total >= n), total - n, total)
+
+# Miller-Rabin over a uint64 array of odd n > 37, all bases at once per array operation.
+# Numbers are kept in Montgomery form (x * 2**64 mod n) so that every step is a
+# montgomery_multiply, and the ones that fail a base are dropped before the next.
+def miller_rabin_array(n, bases=MILLER_RABIN_BASES):
+    index = np.arange(len(n))
+    n_inverse = n.copy()  # Correct to 3 bits for odd n; each Newton step doubles that
+    for _ in range(5):
+        n_inverse *= np.uint64(2) - n * n_inverse
+    n_inverse = np.uint64(0) - n_inverse
+    one = (np.uint64(0) - n) % n  # 2**64 mod n, which is 1 in Montgomery form
+
+    # n - 1 = d * 2**s with d odd
+    d, s = n - np.uint64(1), np.zeros(len(n), dtype=np.int64)
+    while np.any(d & np.uint64(1) == 0):
+        even = d & np.uint64(1) == 0
+        d = np.where(even, d >> np.uint64(1), d)
+        s += even
+
+    for a in bases:
+        if not len(n):
+            break
+        minus_one = n - one
+        # a in Montgomery form: a * (2**64 mod n), by doubling and adding
+        base = np.zeros(len(n), dtype=np.uint64)
+        for bit in bin(a)[2:]:
+            base = add_mod(base, base, n)
+            if bit == "1":
+                base = add_mod(base, one, n)
+        # x = base**d, square-and-multiply over the bits of every d at once
+        x = one
+        for k in range(int(d.max()).bit_length() - 1, -1, -1):
+            x = montgomery_multiply(x, x, n, n_inverse)
+            x = np.where(d >> np.uint64(k) & np.uint64(1) == 1, montgomery_multiply(x, base, n, n_inverse), x)
+        passed = (x == one) | (x == minus_one)
+        for r in range(1, int(s.max())):
+            x = montgomery_multiply(x, x, n, n_inverse)
+            passed |= (x == minus_one) & (r < s)
+        keep = np.flatnonzero(passed)
+        index, n, n_inverse, one, d, s = (array[keep] for array in (index, n, n_inverse, one, d, s))
+    return index
+
+# is_prime over a whole array of integers below 2**64, returning a bool array of the
+# same shape. The small-prime filter and Miller-Rabin both run vectorized over the array.
+def is_prime_array(numbers):
+    numbers = np.asarray(numbers)
+    if not np.issubdtype(numbers.dtype, np.integer):
+        raise TypeError("is_prime_array needs an integer array")
+    result = numbers >= 2
+    values = numbers.astype(np.uint64)  # Negative numbers are already False
+    for p in SMALL_PRIMES:
+        result &= (values % np.uint64(p) != 0) | (values == p)
+    # Survivors below SMALL_LIMIT**2 are prime and the prime cache answers the ones it
+    # covers; only the rest need Miller-Rabin
+    flat, flat_values = result.reshape(-1), values.reshape(-1)
+    cached = np.flatnonzero(flat & (flat_values <= prime_cache.limit))
+    flat[cached] = prime_cache.is_prime_array(flat_values[cached])
+    candidates = np.flatnonzero(flat & (flat_values >= SMALL_LIMIT * SMALL_LIMIT)
+                                & (flat_values > prime_cache.limit))
+    flat[candidates] = False
+    flat[candidates[miller_rabin_array(flat_values[candidates])]] = True
+    return result
+
+# Number of primes <= x (pi(x)) without enumerating them, using the Legendre-Meissel
+# idea of counting the numbers that survive sieving by the primes up to sqrt(x).
+# Only the values x // n matter, and there are fewer than 2*sqrt(x) of them: for each
+# of those values v, S(v) starts as v - 1 and crossing off a prime p lowers it by the
+# count of numbers that have p as their smallest prime factor,
+#   S(v) -= S(v // p) - S(p - 1)    for every v >= p*p,
+# which is one vectorized step per prime. Memory is O(sqrt(x)); x = 10**12 takes seconds.
+def prime_count(x):
+    if x < SMALL_LIMIT * SMALL_LIMIT:
+        return len(prime_cache.primes(x))
+    r = math.isqrt(x)
+    quotient = np.zeros(r + 1, dtype=np.int64)
+    quotient[1:] = x // np.arange(1, r + 1, dtype=np.int64)
+    large = quotient - 1                            # large[n] = S(x // n)
+    small = np.arange(-1, r, dtype=np.int64)        # small[v] = S(v) for v <= sqrt(x)
+    small[0] = 0
+    for count, p in enumerate(prime_cache.primes(r).tolist()):
+        # count = S(p - 1), the number of primes below p
+        last = min(r, x // (p * p))
+        # x // (n*p) is a large value while n*p <= sqrt(x), a small one after that
+        split = min(last, r // p)
+        large[1:split + 1] -= large[p:split * p + 1:p] - count
+        large[split + 1:last + 1] -= small[quotient[split + 1:last + 1] // p] - count
+        if p * p <= r:
+            small[p * p:] -= np.repeat(small[p:r // p + 1], p)[:r + 1 - p * p] - count
+    return int(large[1])
+
+if __name__ == "__main__":
+    print_primes_in_range(5, 13)
+    print()
+    print(primes_in_range(10**12, 10**12 + 100))
+    print(is_prime(2**61 - 1), is_prime(2**64 - 59), is_prime(561))
+    print(is_prime_array([0, 1, 2, 91, 97, 2**61 - 1]))
+    print(prime_count(10**9))
+    print(sum(len(primes) for primes in parallel_primes_in_range(0, 10**8)))
+
+    # A cache file makes the sieve a one-time cost per host
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "primes.bin")
+        use_prime_cache(path, 10**7)
+        cache = use_prime_cache(path)
+        print(cache.limit, cache.is_prime(9999991), len(cache.primes(10**7)))
@@ -1,15 +1,99 @@
 # Simple Python script to calculate the factorial of a number.
 
-def factorial(n):
-    """Calculates the factorial of a non-negative integer n."""
-    if n == 0 or n == 1:
+import math
+from functools import lru_cache
+
+import Findindprime
+
+def product(values):
+    """Multiplies a list of integers pairwise, level by level.
+
+    Keeping the operands of every multiplication about the same size lets Python's
+    Karatsuba multiplication do the work, instead of growing one huge number by a
+    small factor at a time.
+    """
+    values = list(values)
+    if not values:
         return 1
-    else:
+    while len(values) > 1:
+        paired = [values[i] * values[i + 1] for i in range(0, len(values) - 1, 2)]
+        if len(values) % 2:
+            paired.append(values[-1])
+        values = paired
+    return values[0]
+
+def range_product(low, high):
+    """Product of the integers low..high-1 by binary splitting."""
+    if high - low <= 16:
+        result = 1
+        for i in range(low, high):
+            result *= i
+        return result
+    middle = (low + high) // 2
+    return range_product(low, middle) * range_product(middle, high)
+
+def swing(n):
+    """The swinging factorial n! / ((n // 2)!)**2, from its prime factorization.
+
+    A prime p divides it (n // p) % 2 + (n // p**2) % 2 + ... times. Primes above
+    sqrt(n) therefore appear at most once, and all of them come from the prime cache.
+    """
+    primes = Findindprime.prime_cache.primes(n)
+    root = math.isqrt(n)
+    small = primes[primes <= root].tolist()
+    large = primes[primes > root]
+    factors = large[(n // large) % 2 == 1].tolist()
+    for p in small:
+        exponent, power = 0, p
+        while power <= n:
+            exponent += (n // power) % 2
+            power *= p
+        factors.append(p ** exponent)
+    return product(factors)
+
+def prime_swing_factorial(n):
+    """Factorial by the prime swing recursion n! = ((n // 2)!)**2 * swing(n)."""
+    if n < 2:
+        return 1
+    return factorial(n // 2) ** 2 * swing(n)
+
+# Above about this n the prime swing is measurably faster than math.factorial
+SWING_THRESHOLD = 10_000
+
+@lru_cache(maxsize=32)
+def factorial(n, method="auto"):
+    """Calculates the factorial of a non-negative integer n.
+
+    method selects the algorithm:
+      "auto"  - "math" up to SWING_THRESHOLD, "swing" above it (the default)
+      "math"  - math.factorial, implemented in C
+      "split" - product tree over 2..n (binary splitting)
+      "swing" - prime swing recursion over the prime factorization of n!
+      "loop"  - multiplies 2..n one at a time (quadratic, for comparison)
+    The most recent results are cached, so repeated calls are free.
+    """
+    if n < 0:
+        raise ValueError("factorial is only defined for non-negative integers")
+    if method == "auto":
+        method = "math" if n <= SWING_THRESHOLD else "swing"
+    if method == "math":
+        return math.factorial(n)
+    if method == "split":
+        return range_product(2, n + 1)
+    if method == "swing":
+        return prime_swing_factorial(n)
+    if method == "loop":
         result = 1
         for i in range(2, n + 1):
             result *= i
         return result
+    raise ValueError(f"unknown factorial method: {method!r}")
+
+if __name__ == "__main__":
+    # Example usage:
+    number = 5
+    print(f"The factorial of {number} is: {factorial(number)}")
 
-# Example usage:
-number = 5
-print(f"The factorial of {number} is: {factorial(number)}")
\ No newline at end of file
+    # The algorithms agree on a bigger input
+    number = 2000
+    print(len({factorial(number, method) for method in ("math", "split", "swing", "loop")}) == 1)
@@ -1,14 +1,293 @@
+import mmap
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice, repeat
+
+# Translation table for str.translate: letters and digits map to their lowercase form,
+# everything else to None (deleted). Unicode is too big to tabulate up front, so each
+# character is worked out the first time it is seen and remembered after that.
+class NormalizeTable(dict):
+    def __missing__(self, code):
+        char = chr(code)
+        value = char.lower() if char.isalnum() else None
+        self[code] = value
+        return value
+
+TEXT_TABLE = NormalizeTable()
+# The same, but keeping line breaks, for normalizing a whole block of lines at once
+LINES_TABLE = NormalizeTable({ord("\n"): "\n"})
+
+# bytes.translate tables for ASCII input: uppercase to lowercase, non-alphanumerics deleted
+ASCII_ALNUM = bytes(c for c in range(128) if chr(c).isalnum())
+ASCII_TABLE = bytes.maketrans(bytes(range(65, 91)), bytes(range(97, 123)))
+ASCII_DELETE = bytes(c for c in range(256) if c not in ASCII_ALNUM)
+LINES_DELETE = ASCII_DELETE.replace(b"\n", b"")
+
+# Keep only letters and digits, lowercased. Works on str and on bytes.
+def normalize(text, table=TEXT_TABLE):
+    if isinstance(text, str):
+        return text.translate(table)
+    if text.isascii():
+        return text.translate(ASCII_TABLE, ASCII_DELETE if table is TEXT_TABLE else LINES_DELETE)
+    return text.decode("utf-8", "replace").translate(table)
+
+# Two-pointer check of an already normalized string: compare a block from the front
+# with the matching block from the back, moving inwards. Blocks start small, so most
+# non-palindromes are rejected after a few characters, and double in size, so long
+# palindromes take few steps. No reversed copy of the whole string is made.
+def is_normalized_palindrome(text):
+    i, j = 0, len(text)
+    block = 64
+    while j - i > 1:
+        size = min(block, (j - i) // 2)
+        if text[i:i + size] != text[j - size:j][::-1]:
+            return False
+        i += size
+        j -= size
+        block = min(2 * block, 1 << 16)
+    return True
+
 def is_palindrome(text):
-    clean_text = "".join(c for c in text if c.isalnum()).lower()
-    if clean_text == clean_text[::-1]:
+    return is_normalized_palindrome(normalize(text))
+
+# Manacher's algorithm on a normalized string, in linear time. Returns two lists:
+#   odd[i]  = k: the longest odd palindrome centered on i is text[i-k+1:i+k]
+#   even[i] = k: the longest even palindrome centered just before i is text[i-k:i+k]
+# Each center starts from the radius mirrored inside the rightmost palindrome found
+# so far, so the characters compared in total stay linear.
+def palindrome_radii(text):
+    n = len(text)
+    odd, even = [0] * n, [0] * n
+    left, right = 0, -1
+    for i in range(n):
+        k = 1 if i > right else min(odd[left + right - i], right - i + 1)
+        while i - k >= 0 and i + k < n and text[i - k] == text[i + k]:
+            k += 1
+        odd[i] = k
+        if i + k - 1 > right:
+            left, right = i - k + 1, i + k - 1
+    left, right = 0, -1
+    for i in range(n):
+        k = 0 if i > right else min(even[left + right - i + 1], right - i + 1)
+        while i - k - 1 >= 0 and i + k < n and text[i - k - 1] == text[i + k]:
+            k += 1
+        even[i] = k
+        if i + k - 1 > right:
+            left, right = i - k, i + k - 1
+    return odd, even
+
+# The functions below normalize like is_palindrome, and their results (substrings and
+# (start, end) positions) refer to the normalized text.
+
+# Longest palindromic substring; the first one if there are several
+def longest_palindrome(text):
+    text = normalize(text)
+    odd, even = palindrome_radii(text)
+    start, end = 0, 0
+    for i in range(len(text)):
+        if 2 * odd[i] - 1 > end - start:
+            start, end = i - odd[i] + 1, i + odd[i]
+        if 2 * even[i] > end - start:
+            start, end = i - even[i], i + even[i]
+    return text[start:end]
+
+# Number of palindromic substrings, counting every occurrence: a center with radius k
+# is the middle of exactly k palindromes
+def count_palindromes(text):
+    odd, even = palindrome_radii(normalize(text))
+    return sum(odd) + sum(even)
+
+# (start, end) of the maximal palindrome around every center, from left to right
+def maximal_palindromes(text):
+    text = normalize(text)
+    odd, even = palindrome_radii(text)
+    spans = []
+    for i in range(len(text)):
+        if even[i]:
+            spans.append((i - even[i], i + even[i]))
+        spans.append((i - odd[i] + 1, i + odd[i]))
+    return spans
+
+# Eertree (palindromic tree): one node per distinct palindromic substring, built one
+# character at a time in amortized constant time. Node 0 is the root of odd palindromes
+# (length -1) and node 1 the root of even ones (the empty string); every other node
+# stores its length, its longest proper palindromic suffix and where it last ended.
+class Eertree:
+    def __init__(self, text=""):
+        self.text = []
+        self.length = [-1, 0]
+        self.suffix = [0, 0]
+        self.edges = [{}, {}]
+        self.count = [0, 0]  # Occurrences ending at a position where the node was the longest suffix
+        self.end = [-1, -1]
+        self.last = 1  # Node of the longest palindromic suffix of the text so far
+        normalized = normalize(text)
+        for char in normalized.decode() if isinstance(normalized, bytes) else normalized:
+            self.add(char)
+
+    # Walk suffix links from node until the palindrome can be extended by char
+    def extendable(self, node, char):
+        i = len(self.text) - 1
+        while True:
+            j = i - 1 - self.length[node]
+            if j >= 0 and self.text[j] == char:
+                return node
+            node = self.suffix[node]
+
+    # Append one (already normalized) character; returns True if it ends a new palindrome
+    def add(self, char):
+        self.text.append(char)
+        parent = self.extendable(self.last, char)
+        if char in self.edges[parent]:
+            self.last = self.edges[parent][char]
+            self.count[self.last] += 1
+            return False
+        node = len(self.length)
+        self.length.append(self.length[parent] + 2)
+        if self.length[node] == 1:
+            self.suffix.append(1)
+        else:
+            self.suffix.append(self.edges[self.extendable(self.suffix[parent], char)][char])
+        self.edges.append({})
+        self.count.append(1)
+        self.end.append(len(self.text) - 1)
+        self.edges[parent][char] = node
+        self.last = node
         return True
+
+    # Number of distinct palindromic substrings
+    def distinct_count(self):
+        return len(self.length) - 2
+
+    # (start, end) of one occurrence of every distinct palindrome
+    def spans(self):
+        return [(self.end[node] - self.length[node] + 1, self.end[node] + 1)
+                for node in range(2, len(self.length))]
+
+    # Every distinct palindrome with its number of occurrences. Each node counted only
+    # the positions where it was the longest palindromic suffix; its suffix palindromes
+    # occur there too, so counts are pushed down the suffix links, longest first.
+    def occurrences(self):
+        count = list(self.count)
+        for node in range(len(self.length) - 1, 1, -1):
+            count[self.suffix[node]] += count[node]
+        return {"".join(self.text[start:end]): count[node]
+                for node, (start, end) in enumerate(self.spans(), 2)}
+
+# Lines up to this length are compared with their reverse directly, which in Python is
+# cheaper than any loop; longer ones go through is_normalized_palindrome
+SHORT_LINE = 128
+
+# Check a list of lines, normalizing them with one translate call instead of one per line
+def check_lines(lines):
+    if not lines:
+        return []
+    block = ("\n" if isinstance(lines[0], str) else b"\n").join(lines)
+    normalized = normalize(block, LINES_TABLE)
+    normalized = normalized.split("\n" if isinstance(normalized, str) else b"\n")
+    if len(normalized) != len(lines):
+        # Some lines carry their own line breaks, as when iterating over a file
+        normalized = [normalize(line) for line in lines]
+    return [line == line[::-1] if len(line) <= SHORT_LINE else is_normalized_palindrome(line)
+            for line in normalized]
+
+# Lines handed to a worker at a time, and the input size (bytes, or characters for str
+# lines) below which no worker processes are started
+CHUNK_LINES = 50_000
+PARALLEL_BYTES = 16 << 20
+
+# Check every line of an iterable of str or bytes lines, returning a list of bools in
+# order. Once the lines checked so far add up to PARALLEL_BYTES, the rest is checked in
+# worker processes, CHUNK_LINES at a time; workers defaults to all cores, and workers=1
+# keeps everything in this process. Only a bounded number of chunks is in flight, so
+# the lines are read as the workers need them rather than all at once.
+# If a stats dict is passed it is filled with lines, seconds and lines_per_second.
+def is_palindrome_batch(lines, workers=None, stats=None):
+    start = time.perf_counter()
+    workers = workers or os.cpu_count()
+    lines = iter(lines)
+    chunks = iter(lambda: list(islice(lines, CHUNK_LINES)), [])
+    results = []
+    checked = 0
+    for chunk in chunks:
+        results += check_lines(chunk)
+        checked += sum(map(len, chunk))
+        if workers > 1 and checked >= PARALLEL_BYTES:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                pending = deque()
+                for chunk in chunks:
+                    pending.append(executor.submit(check_lines, chunk))
+                    if len(pending) >= 2 * workers:
+                        results += pending.popleft().result()
+                while pending:
+                    results += pending.popleft().result()
+    record_stats(stats, len(results), start)
+    return results
+
+# Check every line of a text file, returning a list of bools in order. Large files are
+# split into blocks of whole lines that worker processes read and check on their own,
+# so no line is ever sent between processes. workers defaults to all cores.
+def is_palindrome_file(path, workers=None, block_size=PARALLEL_BYTES, stats=None):
+    start = time.perf_counter()
+    workers = workers or os.cpu_count()
+    blocks = file_blocks(path, block_size)
+    results = []
+    if workers == 1 or len(blocks) <= 1:
+        for first, last in blocks:
+            results += check_file_block(path, first, last)
     else:
-        return False
+        starts, ends = zip(*blocks)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for block_results in executor.map(check_file_block, repeat(path), starts, ends):
+                results += block_results
+    record_stats(stats, len(results), start)
+    return results
+
+# Split a file into (start, end) byte ranges of about block_size that end on line breaks
+def file_blocks(path, block_size):
+    size = os.path.getsize(path)
+    if size == 0:
+        return []
+    blocks, first = [], 0
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        while first < size:
+            last = data.find(b"\n", min(first + block_size, size) - 1)
+            last = size if last == -1 else last + 1
+            blocks.append((first, last))
+            first = last
+    return blocks
+
+# Read the lines in bytes first..last of a file and check them
+def check_file_block(path, first, last):
+    with open(path, "rb") as f:
+        f.seek(first)
+        data = f.read(last - first)
+    lines = data.split(b"\n")
+    if data.endswith(b"\n"):
+        lines.pop()
+    return check_lines(lines)
+
+def record_stats(stats, lines, start):
+    if stats is not None:
+        seconds = time.perf_counter() - start
+        stats.update(lines=lines, seconds=seconds,
+                     lines_per_second=lines / seconds if seconds else float("inf"))
+
+if __name__ == "__main__":
+    word1 = "level"
+    word2 = "A man, a plan, a canal: Panama"
+    word3 = "hello world"
+
+    print(f"'{word1}' is a palindrome: {is_palindrome(word1)}")
+    print(f"'{word2}' is a palindrome: {is_palindrome(word2)}")
+    print(f"'{word3}' is a palindrome: {is_palindrome(word3)}")
 
-word1 = "level"
-word2 = "A man, a plan, a canal: Panama"
-word3 = "hello world"
+    stats = {}
+    print(is_palindrome_batch([word1, word2, word3], stats=stats), stats)
 
-print(f"'{word1}' is a palindrome: {is_palindrome(word1)}")
-print(f"'{word2}' is a palindrome: {is_palindrome(word2)}")
-print(f"'{word3}' is a palindrome: {is_palindrome(word3)}")
\ No newline at end of file
+    text = "Was it a car or a cat I saw? Anna, kayak"
+    print("Longest palindrome:", longest_palindrome(text))
+    print("Palindromic substrings:", count_palindromes(text))
+    print("Distinct palindromes:", Eertree(text).distinct_count())
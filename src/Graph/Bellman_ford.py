@@ -1,3 +1,10 @@
+import sys
+from collections import deque
+
+import numpy as np
+
+from csr_graph import CSRGraph, INF
+
 # Class to represent an edge in the graph
 class Edge:
     def __init__(self, source, destination, weight):
@@ -5,66 +12,161 @@ class Edge:
         self.destination = destination  # Ending vertex of the edge
         self.weight = weight  # Weight of the edge
 
-# Function to execute the Bellman-Ford algorithm
-def bellman_ford(edges, vertices, source):
+# Parallel (sources, destinations, weights) arrays for a list of Edge objects or a CSRGraph
+def edge_arrays(edges):
+    if isinstance(edges, CSRGraph):
+        return edges.edge_arrays()
+    count = len(edges)
+    sources = np.fromiter((edge.source for edge in edges), dtype=np.int64, count=count)
+    destinations = np.fromiter((edge.destination for edge in edges), dtype=np.int64, count=count)
+    weights = np.fromiter((edge.weight for edge in edges), dtype=np.float64, count=count)
+    return sources, destinations, weights
+
+# Follow predecessors from a vertex relaxed in the last pass until we land on the
+# negative cycle, then walk the cycle once and return it in edge order.
+# Returns None if the chain reaches the source instead.
+def extract_cycle(predecessor, vertex):
+    # After V steps along the predecessor chain we must be on a cycle, if there is one
+    for _ in range(len(predecessor)):
+        vertex = predecessor[vertex]
+        if vertex == -1:
+            return None
+
+    cycle = [int(vertex)]
+    u = predecessor[vertex]
+    while u != vertex:
+        cycle.append(int(u))
+        u = predecessor[u]
+    cycle.reverse()
+    return cycle
+
+# Full-pass Bellman-Ford: relax every edge on each pass
+def bellman_ford_passes(edges, vertices, source):
+    sources, destinations, weights = edge_arrays(edges)
+
+    # Group the edges by destination once so each pass can take the minimum
+    # candidate per vertex with a single reduceat call
+    order = np.argsort(destinations, kind="stable")
+    sources, destinations, weights = sources[order], destinations[order], weights[order]
+    starts = np.diff(destinations, prepend=-1) != 0
+    heads = np.flatnonzero(starts)
+    targets = destinations[heads]
+    group = np.cumsum(starts) - 1  # Index of each edge's destination group
+
     # Initialize distance array with infinity for all vertices
-    distance = [float("inf")] * vertices
+    distance = np.full(vertices, INF)
     # Set the distance to the source vertex to 0
     distance[source] = 0
+    predecessor = np.full(vertices, -1, dtype=np.int64)
 
-    # Relax all edges (vertices - 1) times to find the shortest path
-    for _ in range(vertices - 1):
-        # Loop over each edge in the graph
-        for edge in edges:
-            u = edge.source
-            v = edge.destination
-            weight = edge.weight
+    # Relax all edges at once per pass; V-1 passes always suffice without a
+    # negative cycle, so an improvement in pass V proves that one exists
+    for _ in range(vertices):
+        candidate = distance[sources] + weights
+        best = np.minimum.reduceat(candidate, heads) if len(heads) else candidate[:0]
+        improved = best < distance[targets]
 
-            # If the current edge can relax the distance to vertex v, update the distance
-            if distance[u] != float("inf") and distance[u] + weight < distance[v]:
+        # Stop early once a whole pass changes nothing
+        if not improved.any():
+            return distance, predecessor, None
+
+        changed = targets[improved]
+        distance[changed] = best[improved]
+        # Any edge that produced the new minimum is a valid predecessor
+        winners = np.flatnonzero(improved[group] & (candidate == best[group]))
+        predecessor[destinations[winners]] = sources[winners]
+
+    return distance, predecessor, extract_cycle(predecessor, changed[0])
+
+# Queue-based Bellman-Ford (SPFA) with the small-label-first heuristic: only the
+# out-edges of vertices whose distance changed are relaxed again
+def spfa(edges, vertices, source):
+    graph = edges if isinstance(edges, CSRGraph) else CSRGraph.from_edges(vertices, *edge_arrays(edges))
+    offsets, targets, weights = graph.offsets, graph.targets, graph.edge_weights()
+
+    distance = [INF] * vertices
+    distance[source] = 0
+    predecessor = [-1] * vertices
+    relax_count = [0] * vertices  # How many times each vertex was queued
+    in_queue = bytearray(vertices)
+
+    queue = deque([source])
+    in_queue[source] = 1
+    while queue:
+        u = queue.popleft()
+        in_queue[u] = 0
+        lo, hi = offsets[u], offsets[u + 1]
+        for v, weight in zip(targets[lo:hi].tolist(), weights[lo:hi].tolist()):
+            if distance[u] + weight < distance[v]:
                 distance[v] = distance[u] + weight
+                predecessor[v] = u
+                if in_queue[v]:
+                    continue
 
-    # Check for negative weight cycles
-    for edge in edges:
-        u = edge.source
-        v = edge.destination
-        weight = edge.weight
+                # Cycle guard: without a negative cycle no vertex is queued V times
+                relax_count[v] += 1
+                if relax_count[v] >= vertices:
+                    cycle = extract_cycle(predecessor, v)
+                    if cycle is None:
+                        # The predecessor chain does not show the cycle yet; let the
+                        # full-pass engine find it
+                        return bellman_ford_passes(graph, vertices, source)
+                    return np.array(distance), np.array(predecessor, dtype=np.int64), cycle
 
-        # If we can still relax an edge, then a negative weight cycle exists
-        if distance[u] != float("inf") and distance[u] + weight < distance[v]:
-            print("Graph contains a negative weight cycle")
-            return
+                # Small label first: vertices closer than the queue head jump the queue
+                if queue and distance[v] < distance[queue[0]]:
+                    queue.appendleft(v)
+                else:
+                    queue.append(v)
+                in_queue[v] = 1
 
-    # Print the final shortest distances from the source vertex to each vertex
-    print_solution(distance)
+    return np.array(distance), np.array(predecessor, dtype=np.int64), None
+
+# Function to execute the Bellman-Ford algorithm; edges is a list of Edge objects or a CSRGraph.
+# method is "passes" (vectorized full passes) or "spfa" (queue-based, better on sparse graphs).
+# Returns (distance, predecessor, cycle) where cycle is None or the vertices of a negative cycle.
+def bellman_ford(edges, vertices, source, method="passes"):
+    if method == "passes":
+        return bellman_ford_passes(edges, vertices, source)
+    if method == "spfa":
+        return spfa(edges, vertices, source)
+    raise ValueError(f"unknown Bellman-Ford method: {method!r}")
 
 # Function to print the distances from the source to all vertices
 def print_solution(distance):
     print("Vertex   Distance from Source")
     for i, d in enumerate(distance):
         # Print distance; if unreachable, display infinity symbol
-        print(f"{i} \t\t {d if d != float('inf') else '∞'}")
+        print(f"{i} \t\t {f'{d:.15g}' if d != INF else '∞'}")
 
-# Main function to take user input and run the algorithm
+# Main function to take user input and run the algorithm.
+# Usage: python Bellman_ford.py [edge_list_file [source]] - without a file the graph is read interactively.
 def main():
-    # Take input for number of vertices and edges in the graph
-    vertices = int(input("Enter number of vertices: "))
-    edges_count = int(input("Enter number of edges: "))
-
-    # List to store all edges of the graph
-    edges = []
+    if len(sys.argv) > 1:
+        # Load "source destination weight" lines straight from the file
+        edges = CSRGraph.from_edge_file(sys.argv[1])
+        vertices = edges.V
+        source = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+    else:
+        # Take input for number of vertices and edges in the graph
+        vertices = int(input("Enter number of vertices: "))
+        edges_count = int(input("Enter number of edges: "))
 
-    # Take input for each edge: source, destination, and weight
-    print("Enter edges (source destination weight):")
-    for _ in range(edges_count):
-        source, destination, weight = map(int, input().split())
-        edges.append(Edge(source, destination, weight))
+        # Take input for each edge: source, destination, and weight
+        print("Enter edges (source destination weight):")
+        edges = CSRGraph.from_edge_list(
+            vertices, [tuple(map(int, input().split())) for _ in range(edges_count)])
 
-    # Take input for the source vertex from which to calculate distances
-    source = int(input("Enter the source vertex: "))
+        # Take input for the source vertex from which to calculate distances
+        source = int(input("Enter the source vertex: "))
 
     # Run the Bellman-Ford algorithm on the input data
-    bellman_ford(edges, vertices, source)
+    distance, predecessor, cycle = bellman_ford(edges, vertices, source)
+    if cycle is not None:
+        print("Graph contains a negative weight cycle:", " -> ".join(map(str, cycle + cycle[:1])))
+    else:
+        # Print the final shortest distances from the source vertex to each vertex
+        print_solution(distance)
 
 # Entry point of the program
 if __name__ == "__main__":
@@ -0,0 +1,257 @@
+import heapq
+import os
+
+import numpy as np
+
+from csr_graph import CSRGraph, INF
+
+# Contraction hierarchies for answering many shortest-path queries on one static graph.
+#
+# Preprocessing contracts the vertices one by one in order of importance. Removing a
+# vertex v adds a shortcut u -> w for every path u -> v -> w that no other path
+# (a "witness") can replace. Afterwards every shortest path can be found by searching
+# only "upwards" (towards more important vertices) from both ends, which visits a
+# tiny part of the graph. The hierarchy is stored as two CSR graphs:
+#   up   - edges u -> w with rank[w] > rank[u], searched forward from the source
+#   down - edges u -> w with rank[u] > rank[w], stored reversed at w and searched
+#          backward from the target
+# plus, for every edge, the contracted vertex a shortcut skips over (-1 for original edges).
+
+
+class ContractionHierarchy:
+    FILES = ("rank", "up_offsets", "up_targets", "up_weights", "up_via",
+             "down_offsets", "down_targets", "down_weights", "down_via")
+
+    def __init__(self, rank, up, up_via, down, down_via):
+        self.rank = rank
+        self.up = up
+        self.up_via = up_via
+        self.down = down
+        self.down_via = down_via
+        self.V = len(rank)
+
+    # Build the hierarchy from a CSRGraph or an adjacency dict of (vertex, weight) lists.
+    # witness_limit caps how many vertices each witness search may settle; a lower
+    # limit preprocesses faster but may add shortcuts that are not strictly needed.
+    @classmethod
+    def build(cls, graph, witness_limit=50):
+        if not isinstance(graph, CSRGraph):
+            graph = CSRGraph.from_adjacency(graph)
+        V = graph.V
+
+        # Mutable adjacency of the remaining graph, keeping the lightest parallel edge
+        out_edges = [dict() for _ in range(V)]
+        in_edges = [dict() for _ in range(V)]
+        for u, v, weight in zip(*(array.tolist() for array in graph.edge_arrays())):
+            if weight < 0:
+                raise ValueError("contraction hierarchies need non-negative weights")
+            if u != v and weight < out_edges[u].get(v, INF):
+                out_edges[u][v] = weight
+                in_edges[v][u] = weight
+
+        # Every edge of the final hierarchy: (u, w) -> (weight, via)
+        edges = {(u, v): (weight, -1) for u in range(V) for v, weight in out_edges[u].items()}
+
+        contracted = bytearray(V)
+        deleted_neighbors = [0] * V
+        rank = np.zeros(V, dtype=np.int32)
+
+        def shortcuts_for(v):
+            needed = []
+            for u, in_weight in in_edges[v].items():
+                targets = {w: in_weight + out_weight for w, out_weight in out_edges[v].items() if w != u}
+                if not targets:
+                    continue
+                witness = witness_search(out_edges, contracted, u, v, targets, witness_limit)
+                for w, weight in targets.items():
+                    if witness.get(w, INF) > weight:
+                        needed.append((u, w, weight))
+            return needed
+
+        def priority(v):
+            # Edge difference plus how many neighbors are already gone, which spreads
+            # the contraction evenly over the graph
+            shortcut_count = len(shortcuts_for(v))
+            return shortcut_count - len(in_edges[v]) - len(out_edges[v]) + deleted_neighbors[v]
+
+        queue = [(priority(v), v) for v in range(V)]
+        heapq.heapify(queue)
+        order = 0
+        while queue:
+            _, v = heapq.heappop(queue)
+            # Lazy update: recompute the priority and put v back if it is no longer the minimum
+            current = priority(v)
+            if queue and current > queue[0][0]:
+                heapq.heappush(queue, (current, v))
+                continue
+
+            for u, w, weight in shortcuts_for(v):
+                if weight < out_edges[u].get(w, INF):
+                    out_edges[u][w] = weight
+                    in_edges[w][u] = weight
+                    edges[(u, w)] = (weight, v)
+
+            # Remove v from the remaining graph
+            contracted[v] = 1
+            rank[v] = order
+            order += 1
+            for u in in_edges[v]:
+                del out_edges[u][v]
+                deleted_neighbors[u] += 1
+            for w in out_edges[v]:
+                del in_edges[w][v]
+                deleted_neighbors[w] += 1
+            in_edges[v] = {}
+            out_edges[v] = {}
+
+        # Split the final edges into the upward graph and the reversed downward graph
+        up = [(u, w, weight, via) for (u, w), (weight, via) in edges.items() if rank[w] > rank[u]]
+        down = [(w, u, weight, via) for (u, w), (weight, via) in edges.items() if rank[u] > rank[w]]
+        up_graph, up_via = hierarchy_graph(V, up)
+        down_graph, down_via = hierarchy_graph(V, down)
+        return cls(rank, up_graph, up_via, down_graph, down_via)
+
+    # Save the hierarchy as a directory of .npy files
+    def save(self, path):
+        os.makedirs(path, exist_ok=True)
+        arrays = {
+            "rank": self.rank,
+            "up_offsets": self.up.offsets, "up_targets": self.up.targets,
+            "up_weights": self.up.edge_weights(), "up_via": self.up_via,
+            "down_offsets": self.down.offsets, "down_targets": self.down.targets,
+            "down_weights": self.down.edge_weights(), "down_via": self.down_via,
+        }
+        for name in self.FILES:
+            np.save(os.path.join(path, name + ".npy"), arrays[name])
+
+    # Open a saved hierarchy. The arrays are memory-mapped read-only, so loading is
+    # instant and worker processes opening the same files share one copy in the page cache.
+    @classmethod
+    def load(cls, path, mmap=True):
+        mode = "r" if mmap else None
+        arrays = {name: np.load(os.path.join(path, name + ".npy"), mmap_mode=mode)
+                  for name in cls.FILES}
+        up = CSRGraph(arrays["up_offsets"], arrays["up_targets"], arrays["up_weights"])
+        down = CSRGraph(arrays["down_offsets"], arrays["down_targets"], arrays["down_weights"])
+        return cls(arrays["rank"], up, arrays["up_via"], down, arrays["down_via"])
+
+    # Shortest path from source to target; returns (cost, path) or (inf, []) if unreachable
+    def query(self, source, target):
+        if source == target:
+            return 0, [source]
+
+        # Two upward Dijkstra searches that may both run until their queues are
+        # empty or their smallest key cannot beat the best meeting point
+        dist = ({source: 0}, {target: 0})
+        parent = ({source: None}, {target: None})
+        pq = ([(0, source)], [(0, target)])
+        graphs = (self.up, self.down)
+        best, meeting = INF, None
+
+        while pq[0] or pq[1]:
+            for side in (0, 1):
+                if not pq[side]:
+                    continue
+                current_dist, u = heapq.heappop(pq[side])
+                if current_dist > dist[side][u]:
+                    continue
+                if current_dist >= best:
+                    pq[side].clear()
+                    continue
+                if u in dist[1 - side] and current_dist + dist[1 - side][u] < best:
+                    best, meeting = current_dist + dist[1 - side][u], u
+
+                for v, weight in graphs[side].weighted_neighbors(u):
+                    distance = current_dist + weight
+                    if distance < dist[side].get(v, INF):
+                        dist[side][v] = distance
+                        parent[side][v] = u
+                        heapq.heappush(pq[side], (distance, v))
+
+        if meeting is None:
+            return INF, []
+
+        # Hierarchy path: source ... meeting ... target, possibly using shortcuts
+        path = [meeting]
+        while parent[0][path[0]] is not None:
+            path.insert(0, parent[0][path[0]])
+        while parent[1][path[-1]] is not None:
+            path.append(parent[1][path[-1]])
+        return best, self.unpack(path)
+
+    # Replace every shortcut on a hierarchy path by the two edges it skips over
+    def unpack(self, path):
+        result = [path[0]]
+        stack = [(path[i], path[i + 1]) for i in range(len(path) - 2, -1, -1)]
+        while stack:
+            u, w = stack.pop()
+            via = self.edge_via(u, w)
+            if via == -1:
+                result.append(w)
+            else:
+                stack.append((via, w))
+                stack.append((u, via))
+        return result
+
+    # The vertex skipped by the hierarchy edge u -> w, or -1 for an original edge
+    def edge_via(self, u, w):
+        if self.rank[w] > self.rank[u]:
+            graph, via, origin, other = self.up, self.up_via, u, w
+        else:
+            graph, via, origin, other = self.down, self.down_via, w, u
+        lo = graph.offsets[origin]
+        position = np.flatnonzero(graph.neighbors(origin) == other)[0]
+        return int(via[lo + position])
+
+
+# Local Dijkstra from u that ignores v and contracted vertices. Stops once every target
+# is settled, the distances exceed the largest shortcut, or `limit` vertices are settled.
+def witness_search(out_edges, contracted, u, v, targets, limit):
+    max_weight = max(targets.values())
+    dist = {u: 0}
+    pq = [(0, u)]
+    settled = 0
+    remaining = set(targets)
+    while pq and remaining and settled < limit:
+        current_dist, x = heapq.heappop(pq)
+        if current_dist > dist[x]:
+            continue
+        if current_dist > max_weight:
+            break
+        settled += 1
+        remaining.discard(x)
+        for y, weight in out_edges[x].items():
+            if y == v or contracted[y]:
+                continue
+            distance = current_dist + weight
+            if distance < dist.get(y, INF):
+                dist[y] = distance
+                heapq.heappush(pq, (distance, y))
+    return dist
+
+
+# CSR graph plus parallel via array from (u, w, weight, via) tuples
+def hierarchy_graph(vertices, edges):
+    if not edges:
+        return CSRGraph.from_edges(vertices, [], [], []), np.zeros(0, dtype=np.int32)
+    sources, targets, weights, via = zip(*edges)
+    graph = CSRGraph.from_edges(vertices, sources, targets, weights)
+    # from_edges sorts the edges stably by source; apply the same order to via
+    order = np.argsort(np.asarray(sources), kind="stable")
+    return graph, np.asarray(via, dtype=np.int32)[order]
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    graph = {
+        0: [(1, 4), (2, 1)],
+        1: [(3, 1)],
+        2: [(1, 2), (3, 5)],
+        3: []
+    }
+    hierarchy = ContractionHierarchy.build(graph)
+    with tempfile.TemporaryDirectory() as path:
+        hierarchy.save(path)
+        hierarchy = ContractionHierarchy.load(path)
+        print("Shortest path from 0 to 3:", hierarchy.query(0, 3))
@@ -0,0 +1,397 @@
+import mmap
+import os
+import struct
+import warnings
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# Define a large number for representing infinity
+INF = float('inf')
+
+# Binary graph file: a fixed header followed by the offsets, targets and (optional)
+# weights arrays, each little-endian and starting on a 64-byte boundary.
+# Header fields: magic, version, flags, V, E, targets dtype, weights dtype and the
+# byte position of each array.
+FILE_MAGIC = b"CSRGRAPH"
+FILE_VERSION = 1
+FILE_HEADER = struct.Struct("<8sIIQQ8s8sQQQ")
+FLAG_WEIGHTED = 1
+
+
+# Compact graph stored in CSR (compressed sparse row) form.
+# The out-edges of vertex u are targets[offsets[u]:offsets[u + 1]] with the
+# matching weights, so a graph costs a few bytes per edge instead of a Python
+# object per edge.
+class CSRGraph:
+    def __init__(self, offsets, targets, weights=None):
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.targets = np.asarray(targets)
+        self.weights = None if weights is None else np.asarray(weights)
+        self.V = len(self.offsets) - 1  # Number of vertices
+        self.E = len(self.targets)      # Number of edges
+
+    # Build a graph from parallel source/target(/weight) arrays
+    @classmethod
+    def from_edges(cls, vertices, sources, targets, weights=None, weight_dtype=np.float64):
+        sources = np.asarray(sources, dtype=np.int64)
+        targets = np.asarray(targets, dtype=np.int64)
+        if len(sources) != len(targets):
+            raise ValueError("sources and targets must have the same length")
+        if len(sources) and (min(sources.min(), targets.min()) < 0
+                             or max(sources.max(), targets.max()) >= vertices):
+            raise ValueError("edge endpoint out of range")
+
+        # A stable sort keeps the insertion order of each vertex's edges. Sorting the
+        # unique keys source * E + index gives that order much faster than a stable argsort.
+        E = len(sources)
+        if vertices * max(E, 1) < 2 ** 62:
+            order = np.sort(sources * E + np.arange(E)) % max(E, 1)
+        else:
+            order = np.argsort(sources, kind="stable")
+        counts = np.bincount(sources, minlength=vertices)
+        offsets = np.zeros(vertices + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+
+        index_dtype = np.int32 if vertices <= np.iinfo(np.int32).max else np.int64
+        csr_targets = targets[order].astype(index_dtype)
+        csr_weights = None
+        if weights is not None:
+            csr_weights = np.asarray(weights, dtype=weight_dtype)[order]
+        return cls(offsets, csr_targets, csr_weights)
+
+    # Build a graph from (u, v) or (u, v, weight) tuples
+    @classmethod
+    def from_edge_list(cls, vertices, edges, weight_dtype=np.float64):
+        edges = list(edges)
+        if not edges:
+            return cls.from_edges(vertices, [], [])
+        if len(edges[0]) == 2:
+            sources, targets = zip(*edges)
+            return cls.from_edges(vertices, sources, targets)
+        sources, targets, weights = zip(*edges)
+        return cls.from_edges(vertices, sources, targets, weights, weight_dtype)
+
+    # Build a graph from an adjacency dict such as {0: [1, 2]} or {0: [(1, 4), (2, 1)]}
+    @classmethod
+    def from_adjacency(cls, adjacency, vertices=None, weight_dtype=np.float64):
+        sources, targets, weights = [], [], []
+        weighted = False
+        for u, neighbors in adjacency.items():
+            for item in neighbors:
+                sources.append(u)
+                if isinstance(item, (tuple, list)):
+                    weighted = True
+                    targets.append(item[0])
+                    weights.append(item[1])
+                else:
+                    targets.append(item)
+                    weights.append(1)
+
+        if vertices is None:
+            vertices = max(list(adjacency) + targets, default=-1) + 1
+        return cls.from_edges(vertices, sources, targets,
+                              weights if weighted else None, weight_dtype)
+
+    # Build a graph from an adjacency matrix; entries equal to `missing`
+    # (infinity by default) and the diagonal are not edges
+    @classmethod
+    def from_matrix(cls, matrix, missing=INF, weight_dtype=np.float64):
+        matrix = np.asarray(matrix, dtype=weight_dtype)
+        if matrix.ndim != 2 or matrix.shape[0] != matrix.shape[1]:
+            raise ValueError("adjacency matrix must be square")
+
+        mask = matrix != missing
+        np.fill_diagonal(mask, False)
+        # np.nonzero walks the matrix row by row, so the edges are already grouped by source
+        sources, targets = np.nonzero(mask)
+        return cls.from_edges(len(matrix), sources, targets, matrix[mask], weight_dtype)
+
+    # Build a graph from an edge-list file with one "source target [weight]" edge per
+    # line, separated by whitespace or by `delimiter` (e.g. ","). Lines starting with
+    # "#" or "%" are comments. The file is memory-mapped and parsed by NumPy in chunks
+    # of about chunk_size bytes, so no Python object is created per edge. If vertices
+    # is not given it is one more than the largest vertex id in the file.
+    @classmethod
+    def from_edge_file(cls, path, vertices=None, delimiter=None, chunk_size=1 << 26,
+                       weight_dtype=np.float64):
+        sources, targets, weights = [], [], []
+        with open(path, "rb") as f:
+            # mmap cannot map an empty file
+            if os.fstat(f.fileno()).st_size == 0:
+                return cls.from_edges(vertices or 0, [], [])
+
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                columns = None
+                for block in edge_file_chunks(data, chunk_size):
+                    if delimiter is not None:
+                        block = block.replace(delimiter.encode(), b" ")
+                    if not block.strip():
+                        continue
+                    if columns is None:
+                        columns = len(block.lstrip().split(b"\n", 1)[0].split())
+                        if columns not in (2, 3):
+                            raise ValueError(f"{path}: expected 2 or 3 columns, got {columns}")
+
+                    values = parse_numbers(block, path)
+                    fields = fields_per_line(block)
+                    if np.any(fields != columns) or values.size != fields.size * columns:
+                        raise ValueError(f"{path}: every line must have {columns} columns")
+                    values = values.reshape(-1, columns)
+                    sources.append(values[:, 0].astype(np.int64))
+                    targets.append(values[:, 1].astype(np.int64))
+                    if columns == 3:
+                        weights.append(values[:, 2].astype(weight_dtype))
+
+        sources = np.concatenate(sources) if sources else np.zeros(0, dtype=np.int64)
+        targets = np.concatenate(targets) if targets else np.zeros(0, dtype=np.int64)
+        weights = np.concatenate(weights) if weights else None
+        if vertices is None:
+            vertices = int(max(sources.max(initial=-1), targets.max(initial=-1))) + 1
+        return cls.from_edges(vertices, sources, targets, weights, weight_dtype)
+
+    def __len__(self):
+        return self.V
+
+    # Iterating over the graph yields its vertices, like a dict-of-lists graph
+    def __iter__(self):
+        return iter(range(self.V))
+
+    def __contains__(self, u):
+        return 0 <= u < self.V
+
+    # graph[u] is the list of u's neighbors, like a dict-of-lists graph
+    def __getitem__(self, u):
+        return self.neighbors(u).tolist()
+
+    def __repr__(self):
+        return f"CSRGraph(V={self.V}, E={self.E}, weighted={self.weights is not None})"
+
+    # Array view of u's neighbors (no copy)
+    def neighbors(self, u):
+        return self.targets[self.offsets[u]:self.offsets[u + 1]]
+
+    # (neighbor, weight) pairs for the out-edges of u
+    def weighted_neighbors(self, u):
+        lo, hi = self.offsets[u], self.offsets[u + 1]
+        if self.weights is None:
+            return [(v, 1) for v in self.targets[lo:hi].tolist()]
+        return list(zip(self.targets[lo:hi].tolist(), self.weights[lo:hi].tolist()))
+
+    def out_degree(self):
+        return np.diff(self.offsets)
+
+    def in_degree(self):
+        return np.bincount(self.targets, minlength=self.V)
+
+    # Source vertex of every edge, in CSR order
+    def edge_sources(self):
+        return np.repeat(np.arange(self.V, dtype=self.targets.dtype), self.out_degree())
+
+    # Edge weights, with unweighted graphs treated as having unit weights
+    def edge_weights(self, dtype=None):
+        if self.weights is None:
+            return np.ones(self.E, dtype=dtype or np.float64)
+        if dtype is None:
+            return self.weights
+        return self.weights.astype(dtype, copy=False)
+
+    # Parallel (sources, targets, weights) arrays for every edge
+    def edge_arrays(self):
+        return self.edge_sources(), self.targets, self.edge_weights()
+
+    # Graph with every edge reversed
+    def reverse(self):
+        weight_dtype = np.float64 if self.weights is None else self.weights.dtype
+        return CSRGraph.from_edges(self.V, self.targets, self.edge_sources(), self.weights,
+                                   weight_dtype)
+
+    # Dense adjacency matrix with INF for missing edges and 0 on the diagonal
+    def to_matrix(self, dtype=np.float64):
+        matrix = np.full((self.V, self.V), INF, dtype=dtype)
+        # Keep the lightest of any parallel edges
+        np.minimum.at(matrix, (self.edge_sources(), self.targets), self.edge_weights(dtype))
+        np.fill_diagonal(matrix, np.minimum(matrix.diagonal(), 0))
+        return matrix
+
+    # Copy the CSR arrays into one shared memory block so other processes can attach
+    # to the graph instead of receiving a pickled copy. Returns the block, which the
+    # caller must close() and unlink() when done, and a small picklable descriptor.
+    def to_shared_memory(self):
+        arrays = {"offsets": self.offsets, "targets": self.targets}
+        if self.weights is not None:
+            arrays["weights"] = self.weights
+
+        layout, size = {}, 0
+        for name, array in arrays.items():
+            layout[name] = (size, array.dtype.str, len(array))
+            size += array.nbytes
+        shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        for name, array in arrays.items():
+            start, dtype, length = layout[name]
+            np.ndarray(length, dtype=dtype, buffer=shm.buf, offset=start)[:] = array
+        return shm, {"name": shm.name, "layout": layout}
+
+    # Attach to a graph published with to_shared_memory. Returns the graph and the
+    # block, which must be kept alive (and closed, not unlinked) by the caller.
+    @classmethod
+    def from_shared_memory(cls, descriptor):
+        shm = shared_memory.SharedMemory(name=descriptor["name"])
+        arrays = {}
+        for name, (start, dtype, length) in descriptor["layout"].items():
+            arrays[name] = np.ndarray(length, dtype=dtype, buffer=shm.buf, offset=start)
+        return cls(arrays["offsets"], arrays["targets"], arrays.get("weights")), shm
+
+    # Save the graph in the binary graph format, so CSRGraph.open can map it back
+    # without parsing or rebuilding anything
+    def save(self, path):
+        arrays = [self.offsets, self.targets]
+        if self.weights is not None:
+            arrays.append(self.weights)
+        arrays = [array.astype(array.dtype.newbyteorder("<"), copy=False) for array in arrays]
+
+        positions, position = [], align(FILE_HEADER.size)
+        for array in arrays:
+            positions.append(position)
+            position = align(position + array.nbytes)
+        positions += [0] * (3 - len(positions))
+
+        header = FILE_HEADER.pack(
+            FILE_MAGIC, FILE_VERSION, FLAG_WEIGHTED if self.weights is not None else 0,
+            self.V, self.E, arrays[1].dtype.str.encode(),
+            arrays[2].dtype.str.encode() if self.weights is not None else b"",
+            *positions)
+        with open(path, "wb") as f:
+            f.write(header)
+            for array, position in zip(arrays, positions):
+                f.seek(position)
+                f.write(array.tobytes())
+
+    # Open a graph saved with save(). With mmap=True (the default) the arrays are
+    # read-only np.memmap views of the file: opening is instant whatever the size,
+    # pages are read on first use, and processes opening the same file share them.
+    @classmethod
+    def open(cls, path, mmap=True):
+        with open(path, "rb") as f:
+            header = f.read(FILE_HEADER.size)
+        if len(header) < FILE_HEADER.size or header[:len(FILE_MAGIC)] != FILE_MAGIC:
+            raise ValueError(f"{path}: not a binary graph file")
+        (_, version, flags, V, E, targets_dtype, weights_dtype,
+         offsets_at, targets_at, weights_at) = FILE_HEADER.unpack(header)
+        if version != FILE_VERSION:
+            raise ValueError(f"{path}: unsupported graph file version {version}")
+
+        def load(dtype, count, position):
+            dtype = np.dtype(dtype.rstrip(b"\0").decode())
+            if count == 0:
+                return np.zeros(0, dtype=dtype)
+            if mmap:
+                return np.memmap(path, dtype=dtype, mode="r", offset=position, shape=(count,))
+            return np.fromfile(path, dtype=dtype, count=count, offset=position)
+
+        offsets = load(b"<i8", V + 1, offsets_at)
+        targets = load(targets_dtype, E, targets_at)
+        weights = load(weights_dtype, E, weights_at) if flags & FLAG_WEIGHTED else None
+        return cls(offsets, targets, weights)
+
+    # Memory used by the CSR arrays, in bytes
+    def nbytes(self):
+        total = self.offsets.nbytes + self.targets.nbytes
+        if self.weights is not None:
+            total += self.weights.nbytes
+        return total
+
+
+# DFS vertex states
+WHITE, GREY, BLACK = 0, 1, 2
+
+# Shared by the graph classes of the topological sort and cycle detection modules,
+# which keep the number of vertices in self.V and the edges in self.graph: either a
+# defaultdict(list) filled by add_edge, or a CSRGraph shared through from_csr.
+class CSRBackedGraph:
+    # Build the graph on top of a CSRGraph so its arrays are shared, not copied.
+    # Such a graph is read-only: add edges before building the CSRGraph.
+    @classmethod
+    def from_csr(cls, csr):
+        g = cls(csr.V)
+        g.graph = csr
+        return g
+
+    # Function to add an edge to the graph
+    def add_edge(self, u, v):
+        if isinstance(self.graph, CSRGraph):
+            raise TypeError("a graph built with from_csr is read-only")
+        self.graph[u].append(v)
+
+    # Neighbors of v, without inserting empty lists into the defaultdict
+    def neighbors(self, v):
+        return self.graph[v] if v in self.graph else ()
+
+    # Graph as CSR arrays. A defaultdict graph is converted again on every call, since
+    # add_edge may have changed it: call once and keep the result
+    def csr(self):
+        if isinstance(self.graph, CSRGraph):
+            return self.graph
+        return CSRGraph.from_adjacency(self.graph, vertices=self.V)
+
+
+# Round a file position up to the next 64-byte boundary
+def align(position):
+    return (position + 63) // 64 * 64
+
+# Split a memory-mapped edge-list file into blocks of whole lines, without comment lines
+def edge_file_chunks(data, chunk_size):
+    start = 0
+    while start < len(data):
+        end = min(start + chunk_size, len(data))
+        if end < len(data):
+            # Extend the block to the end of its last line
+            newline = data.find(b"\n", end)
+            end = len(data) if newline == -1 else newline + 1
+        block = data[start:end]
+        start = end
+
+        if b"#" in block or b"%" in block:
+            block = b"\n".join(line for line in block.split(b"\n")
+                               if not line.lstrip().startswith((b"#", b"%")))
+        yield block
+
+# Number of whitespace-separated fields on every non-blank line of a block, counted
+# with array operations so that the loader still creates no Python object per line
+WHITESPACE = np.frombuffer(b" \t\r\n\v\f", dtype=np.uint8)
+
+def fields_per_line(block):
+    data = np.frombuffer(block, dtype=np.uint8)
+    space = np.isin(data, WHITESPACE)
+    # A field starts at a non-space byte that follows a space or the start of the block
+    starts = np.flatnonzero(~space & np.concatenate(([True], space[:-1])))
+    newlines = np.flatnonzero(data == ord("\n"))
+    counts = np.bincount(np.searchsorted(newlines, starts))
+    return counts[counts > 0]
+
+# Parse a block of whitespace-separated numbers in one NumPy call
+def parse_numbers(block, path):
+    with warnings.catch_warnings():
+        # Older NumPy only warns when it stops at text it cannot parse
+        warnings.simplefilter("error", DeprecationWarning)
+        # Integers parse several times faster, so only fall back to floats when needed
+        for dtype in (np.int64, np.float64):
+            try:
+                return np.fromstring(block, dtype=dtype, sep=" ")
+            except (DeprecationWarning, ValueError):
+                pass
+    raise ValueError(f"{path}: malformed edge list")
+
+
+# Example usage
+if __name__ == "__main__":
+    g = CSRGraph.from_adjacency({
+        0: [(1, 4), (2, 1)],
+        1: [(3, 1)],
+        2: [(1, 2), (3, 5)],
+        3: []
+    })
+    print(g)
+    for u in g:
+        print(u, "->", g.weighted_neighbors(u))
+    print(g.to_matrix())
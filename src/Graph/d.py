@@ -1,24 +1,31 @@
 from collections import defaultdict, deque
 
+import numpy as np
+
+from csr_graph import CSRBackedGraph, CSRGraph
+
+# Layers with fewer vertices and fewer out-edges than this are handled one vertex at a
+# time by topological_layers
+SMALL_LAYER = 64
+
 # Graph class for Kahn's Algorithm (BFS-based Topological Sort)
-class Graph:
+class Graph(CSRBackedGraph):
     def __init__(self, vertices):
         self.graph = defaultdict(list)  # Default dictionary to store the graph
         self.V = vertices               # Number of vertices
 
-    # Function to add an edge to the graph
-    def add_edge(self, u, v):
-        self.graph[u].append(v)
-
     # Function to perform Topological Sort using Kahn's Algorithm
     def topological_sort(self):
         # Create a list to store the in-degree of all vertices
-        in_degree = [0] * self.V
+        if isinstance(self.graph, CSRGraph):
+            in_degree = self.graph.in_degree().tolist()
+        else:
+            in_degree = [0] * self.V
 
-        # Fill the in-degree list
-        for u in self.graph:
-            for v in self.graph[u]:
-                in_degree[v] += 1
+            # Fill the in-degree list
+            for u in self.graph:
+                for v in self.graph[u]:
+                    in_degree[v] += 1
 
         # Queue to store all vertices with in-degree 0
         queue = deque([i for i in range(self.V) if in_degree[i] == 0])
@@ -44,14 +51,72 @@ class Graph:
         else:
             print("The graph has a cycle and topological sort is not possible.")
 
+    # Level-synchronous Kahn's Algorithm: returns the vertices grouped into layers,
+    # where layer i holds every vertex whose longest path from a source has i edges.
+    # The vertices of one layer do not depend on each other, so each layer is a batch
+    # of tasks that can run concurrently. Wide layers are processed at once with
+    # vectorized in-degree updates over the CSR arrays; narrow ones vertex by vertex,
+    # since on deep graphs such as long chains the fixed cost of the array operations
+    # would otherwise be paid for every single vertex.
+    def topological_layers(self):
+        graph = self.csr()
+        offsets, targets = graph.offsets, graph.targets
+        in_degree = graph.in_degree()
+        # memoryviews of the same arrays, for fast access to single elements
+        offset, target, degree = memoryview(offsets), memoryview(targets), memoryview(in_degree)
+
+        # The layers are written one after another into order; bounds[i] is where layer i starts
+        order = np.empty(self.V, dtype=np.int64)
+        ordered = memoryview(order)
+        bounds = [0]
+        frontier = np.flatnonzero(in_degree == 0)
+        while len(frontier):
+            done = bounds[-1]
+            bounds.append(done + len(frontier))
+
+            if len(frontier) < SMALL_LAYER and \
+                    sum(offset[u + 1] - offset[u] for u in frontier) < SMALL_LAYER:
+                following = []
+                for u in frontier:
+                    ordered[done] = u
+                    done += 1
+                    for v in target[offset[u]:offset[u + 1]]:
+                        degree[v] -= 1
+                        if degree[v] == 0:
+                            following.append(v)
+                frontier = sorted(following)
+                continue
+
+            # Positions of all out-edges of the frontier, gathered without a Python loop
+            frontier = np.asarray(frontier)
+            order[done:bounds[-1]] = frontier
+            starts = offsets[frontier]
+            counts = offsets[frontier + 1] - starts
+            first = np.cumsum(counts) - counts  # Where each vertex's edges start in the batch
+            edges = np.repeat(starts - first, counts) + np.arange(counts.sum())
+
+            # Decrease in-degrees; the vertices that reach 0 form the next layer
+            neighbors, removed = np.unique(targets[edges], return_counts=True)
+            in_degree[neighbors] -= removed
+            frontier = neighbors[in_degree[neighbors] == 0]
+
+        if bounds[-1] != self.V:
+            raise ValueError("The graph has a cycle and topological sort is not possible.")
+        return [order[start:end] for start, end in zip(bounds, bounds[1:])]
+
 # Example usage
-g = Graph(6)
-g.add_edge(5, 2)
-g.add_edge(5, 0)
-g.add_edge(4, 0)
-g.add_edge(4, 1)
-g.add_edge(2, 3)
-g.add_edge(3, 1)
-
-print("Topological Sort of the given graph:")
-g.topological_sort()
+if __name__ == "__main__":
+    g = Graph(6)
+    g.add_edge(5, 2)
+    g.add_edge(5, 0)
+    g.add_edge(4, 0)
+    g.add_edge(4, 1)
+    g.add_edge(2, 3)
+    g.add_edge(3, 1)
+
+    print("Topological Sort of the given graph:")
+    g.topological_sort()
+
+    print("Layers of tasks that can run concurrently:")
+    for depth, layer in enumerate(g.topological_layers()):
+        print(depth, layer.tolist())
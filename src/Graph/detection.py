@@ -1,54 +1,139 @@
 from collections import defaultdict
 
+import numpy as np
+
+from csr_graph import BLACK, GREY, WHITE, CSRBackedGraph, CSRGraph
+
 # Graph class to represent a directed graph
-class Graph:
+class Graph(CSRBackedGraph):
     def __init__(self, vertices):
         self.graph = defaultdict(list)  # Default dictionary to store the graph
         self.V = vertices               # Number of vertices in the graph
 
-    # Function to add an edge to the graph
-    def add_edge(self, u, v):
-        self.graph[u].append(v)
-
-    # Helper function to perform DFS and detect a cycle
-    def is_cyclic_util(self, v, visited, rec_stack):
-        visited[v] = True
-        rec_stack[v] = True
-
-        # Recur for all vertices adjacent to this vertex
-        for neighbor in self.graph[v]:
-            # If the neighbor is not visited, do a DFS from that node
-            if not visited[neighbor]:
-                if self.is_cyclic_util(neighbor, visited, rec_stack):
-                    return True
-            # If the neighbor is in the recursion stack, we found a cycle
-            elif rec_stack[neighbor]:
-                return True
-
-        # Remove the vertex from recursion stack
-        rec_stack[v] = False
-        return False
+    # Find a cycle with an iterative DFS, so deep graphs cannot hit the recursion limit.
+    # Returns the cycle as a list of vertices, each with an edge to the next and the
+    # last one with an edge back to the first, or None if the graph is acyclic.
+    def find_cycle(self):
+        # WHITE: not visited yet, GREY: on the current DFS path, BLACK: finished
+        state = bytearray(self.V)
+
+        for start in range(self.V):
+            if state[start] != WHITE:
+                continue
+
+            # Explicit stack of (vertex, iterator over its neighbors), plus the DFS path itself
+            state[start] = GREY
+            stack = [(start, iter(self.neighbors(start)))]
+            path = [start]
+            while stack:
+                v, neighbors = stack[-1]
+                for neighbor in neighbors:
+                    # Go deeper into unvisited vertices
+                    if state[neighbor] == WHITE:
+                        state[neighbor] = GREY
+                        stack.append((neighbor, iter(self.neighbors(neighbor))))
+                        path.append(neighbor)
+                        break
+                    # An edge back into the current path closes a cycle
+                    if state[neighbor] == GREY:
+                        return path[path.index(neighbor):]
+                else:
+                    # All neighbors are done, so v is finished
+                    state[v] = BLACK
+                    stack.pop()
+                    path.pop()
+        return None
 
     # Main function to detect a cycle in the graph
     def is_cyclic(self):
-        visited = [False] * self.V
-        rec_stack = [False] * self.V
+        return self.find_cycle() is not None
+
+    # Strongly connected components with an iterative version of Tarjan's algorithm,
+    # in linear time. Returns an int32 array with the component of every vertex.
+    # Components are numbered in topological order of the condensation: every edge
+    # between two components goes from a lower label to a higher one.
+    def strongly_connected_components(self):
+        index = [-1] * self.V    # DFS discovery order of every vertex
+        low = [0] * self.V       # Smallest index reachable through the DFS subtree
+        on_stack = bytearray(self.V)
+        stack = []               # Vertices whose component is not finished yet
+        component = [-1] * self.V
+        counter = components = 0
+
+        for start in range(self.V):
+            if index[start] != -1:
+                continue
 
-        # Call the helper function for every vertex to detect a cycle
-        for node in range(self.V):
-            if not visited[node]:
-                if self.is_cyclic_util(node, visited, rec_stack):
-                    return True
-        return False
+            index[start] = low[start] = counter
+            counter += 1
+            stack.append(start)
+            on_stack[start] = 1
+            work = [(start, iter(self.neighbors(start)))]
+            while work:
+                v, neighbors = work[-1]
+                for neighbor in neighbors:
+                    if index[neighbor] == -1:
+                        index[neighbor] = low[neighbor] = counter
+                        counter += 1
+                        stack.append(neighbor)
+                        on_stack[neighbor] = 1
+                        work.append((neighbor, iter(self.neighbors(neighbor))))
+                        break
+                    if on_stack[neighbor]:
+                        low[v] = min(low[v], index[neighbor])
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        low[parent] = min(low[parent], low[v])
+                    # v is the root of a component: pop the whole component off the stack
+                    if low[v] == index[v]:
+                        while True:
+                            w = stack.pop()
+                            on_stack[w] = 0
+                            component[w] = components
+                            if w == v:
+                                break
+                        components += 1
+
+        # Tarjan finishes components in reverse topological order, so flip the labels
+        labels = np.array(component, dtype=np.int32)
+        return components - 1 - labels
+
+    # Condensation DAG: one vertex per strongly connected component and one edge for
+    # every pair of components joined by at least one edge. Returns (labels, dag) where
+    # dag is a CSRGraph that can go straight into the topological sorts, e.g.
+    # d.Graph.from_csr(dag).topological_layers().
+    def condensation(self):
+        labels = self.strongly_connected_components()
+        components = int(labels.max()) + 1 if self.V else 0
+
+        graph = self.csr()
+        sources = labels[graph.edge_sources()].astype(np.int64)
+        targets = labels[graph.targets].astype(np.int64)
+        between = sources != targets
+        pairs = np.unique(sources[between] * components + targets[between])
+        dag = CSRGraph.from_edges(components, pairs // max(components, 1), pairs % max(components, 1))
+        return labels, dag
 
 # Example usage
-g = Graph(4)
-g.add_edge(0, 1)
-g.add_edge(1, 2)
-g.add_edge(2, 0)  # Adding this edge creates a cycle
-g.add_edge(2, 3)
-
-if g.is_cyclic():
-    print("Graph contains a cycle")
-else:
-    print("Graph does not contain a cycle")
+if __name__ == "__main__":
+    g = Graph(4)
+    g.add_edge(0, 1)
+    g.add_edge(1, 2)
+    g.add_edge(2, 0)  # Adding this edge creates a cycle
+    g.add_edge(2, 3)
+
+    cycle = g.find_cycle()
+    if cycle is not None:
+        print("Graph contains a cycle:", cycle)
+    else:
+        print("Graph does not contain a cycle")
+
+    # Strongly connected components and the DAG between them
+    from d import Graph as KahnGraph
+
+    labels, dag = g.condensation()
+    print("Component of every vertex:", labels.tolist())
+    print("Components in dependency layers:",
+          [layer.tolist() for layer in KahnGraph.from_csr(dag).topological_layers()])
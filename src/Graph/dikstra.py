@@ -1,47 +1,287 @@
 import heapq
+import math
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 
-# Dijkstra's algorithm
-def dijkstra(graph, src):
+import numpy as np
+
+from csr_graph import CSRGraph, INF
+from priority_queues import BucketQueue, IndexedHeap, LazyHeap
+
+# (neighbor, weight) pairs of u in an adjacency dict or a CSRGraph
+def weighted_neighbors(graph, u):
+    if isinstance(graph, CSRGraph):
+        return graph.weighted_neighbors(u)
+    return graph.get(u, ())
+
+# Largest edge weight, checking that Dial's algorithm can use the weights
+def max_integer_weight(graph):
+    if isinstance(graph, CSRGraph):
+        weights = graph.edge_weights()
+        if not np.issubdtype(weights.dtype, np.integer) and np.any(weights != np.floor(weights)):
+            raise ValueError("Dial's algorithm needs integer weights")
+        weights = weights.tolist()
+    else:
+        weights = [weight for u in graph for _, weight in graph[u]]
+        if any(weight != int(weight) for weight in weights):
+            raise ValueError("Dial's algorithm needs integer weights")
+    if any(weight < 0 for weight in weights):
+        raise ValueError("Dijkstra's algorithm needs non-negative weights")
+    return int(max(weights, default=0))
+
+# Dijkstra's algorithm; graph is an adjacency dict of (vertex, weight) lists or a CSRGraph.
+# queue selects the priority queue backend:
+#   "lazy"    - binary heap that pushes duplicates and skips stale entries (the default)
+#   "indexed" - binary heap with real decrease-key, never larger than V
+#   "radix"   - Dial's bucket queue, for small non-negative integer weights
+# If a stats dict is passed it is filled with the queue's counters (pushes, pops,
+# stale_pops, decrease_keys, peak_size). Returns the list of shortest distances from src.
+def dijkstra(graph, src, queue="lazy", stats=None):
     # Number of vertices in the graph
     V = len(graph)
-    
+
     # Distances array, initialized to infinity
     dist = [float('inf')] * V
     dist[src] = 0  # Distance to the source itself is 0
 
-    # Priority queue (min-heap) for exploring the next vertex with the shortest known distance
-    pq = [(0, src)]  # (distance, vertex)
-    
-    while pq:
+    # Without stats the default queue needs no bookkeeping at all: a plain heapq loop
+    if queue == "lazy" and stats is None:
+        return heap_dijkstra(graph, src, dist)
+
+    # Priority queue for exploring the next vertex with the shortest known distance
+    if queue == "lazy":
+        pq = LazyHeap(V)
+    elif queue == "indexed":
+        pq = IndexedHeap(V)
+    elif queue == "radix":
+        pq = BucketQueue(V, max_integer_weight(graph))
+    else:
+        raise ValueError(f"unknown priority queue: {queue!r}")
+    pq.push(src, 0)
+
+    while True:
         # Get the vertex with the smallest distance
+        item = pq.pop()
+        if item is None:
+            break
+        current_dist, u = item
+
+        # Explore the neighbors of the current vertex
+        for v, weight in weighted_neighbors(graph, u):
+            distance = current_dist + weight
+
+            # If a shorter path to the vertex v is found
+            if distance < dist[v]:
+                dist[v] = distance
+                pq.push(v, distance)
+
+    if stats is not None:
+        stats.update(pq.stats)
+    return dist
+
+# Dijkstra's algorithm with a bare heapq min-heap of (distance, vertex) entries, the
+# uninstrumented form of the "lazy" queue: an entry whose distance is no longer the
+# best known one for its vertex is stale and skipped
+def heap_dijkstra(graph, src, dist):
+    pq = [(0, src)]
+    while pq:
         current_dist, u = heapq.heappop(pq)
-        
-        # If the current distance is greater than the known shortest distance, skip
         if current_dist > dist[u]:
             continue
-        
-        # Explore the neighbors of the current vertex
-        for v, weight in graph[u]:
+        for v, weight in weighted_neighbors(graph, u):
             distance = current_dist + weight
-            
-            # If a shorter path to the vertex v is found
             if distance < dist[v]:
                 dist[v] = distance
                 heapq.heappush(pq, (distance, v))
-    
-    # Print the shortest distances from the source
+    return dist
+
+# Print the shortest distances from the source
+def print_solution(dist):
     print("Vertex\tDistance from Source")
-    for i in range(V):
+    for i in range(len(dist)):
         print(f"{i}\t\t{dist[i]}")
 
-# Example graph represented as an adjacency list
-graph = {
-    0: [(1, 4), (2, 1)],
-    1: [(3, 1)],
-    2: [(1, 2), (3, 5)],
-    3: []
-}
-
-# Running the algorithm
-src_vertex = 0  # Starting from vertex 0
-dijkstra(graph, src_vertex)
+# Walk parent links back from the target and return the path in order
+def build_path(parent, target):
+    path = [target]
+    while parent[path[-1]] is not None:
+        path.append(parent[path[-1]])
+    path.reverse()
+    return path
+
+# Graph with every edge reversed, for searching backwards from the target
+def reverse_graph(graph):
+    if isinstance(graph, CSRGraph):
+        return graph.reverse()
+    reverse = {u: [] for u in graph}
+    for u in graph:
+        for v, weight in graph[u]:
+            reverse.setdefault(v, []).append((u, weight))
+    return reverse
+
+# A* heuristic for graphs whose vertices are points in the plane: the straight-line
+# distance never overestimates the path length when edge weights are Euclidean lengths
+def euclidean_heuristic(coordinates):
+    def heuristic(v, target):
+        return math.dist(coordinates[v], coordinates[target])
+    return heuristic
+
+# Single-pair shortest path. Distances are kept in dicts so only the vertices the
+# search reaches are touched. method is one of:
+#   "dijkstra"      - stops as soon as the target is settled
+#   "bidirectional" - searches forward from source and backward from target until they meet;
+#                     pass reverse=reverse_graph(graph) to reuse it across queries
+#   "astar"         - Dijkstra guided by heuristic(v, target), e.g. euclidean_heuristic(coords)
+# Returns (cost, path), or (inf, []) if the target is unreachable.
+def shortest_path(graph, source, target, method="dijkstra", heuristic=None, reverse=None):
+    if method == "dijkstra":
+        return astar(graph, source, target, lambda v, t: 0)
+    if method == "astar":
+        if heuristic is None:
+            raise ValueError("A* needs a heuristic")
+        return astar(graph, source, target, heuristic)
+    if method == "bidirectional":
+        if reverse is None:
+            reverse = reverse_graph(graph)
+        return bidirectional_dijkstra(graph, reverse, source, target)
+    raise ValueError(f"unknown shortest path method: {method!r}")
+
+# A* search; with a zero heuristic this is Dijkstra with early termination
+def astar(graph, source, target, heuristic):
+    dist = {source: 0}
+    parent = {source: None}
+    settled = set()
+    pq = [(heuristic(source, target), source)]  # (distance + estimate, vertex)
+
+    while pq:
+        _, u = heapq.heappop(pq)
+        if u in settled:
+            continue
+        # The target is settled: its distance can no longer improve
+        if u == target:
+            return dist[u], build_path(parent, target)
+        settled.add(u)
+
+        for v, weight in weighted_neighbors(graph, u):
+            distance = dist[u] + weight
+            if distance < dist.get(v, INF):
+                dist[v] = distance
+                parent[v] = u
+                heapq.heappush(pq, (distance + heuristic(v, target), v))
+
+    return INF, []
+
+# Bidirectional Dijkstra: alternate forward steps on graph and backward steps on
+# reverse until the two frontiers together cannot beat the best meeting found
+def bidirectional_dijkstra(graph, reverse, source, target):
+    if source == target:
+        return 0, [source]
+
+    dist = ({source: 0}, {target: 0})
+    parent = ({source: None}, {target: None})
+    settled = (set(), set())
+    pq = ([(0, source)], [(0, target)])
+    graphs = (graph, reverse)
+    best, meeting = INF, None
+
+    while pq[0] and pq[1]:
+        # Once the two smallest keys add up to the best path, no better path exists
+        if pq[0][0][0] + pq[1][0][0] >= best:
+            break
+
+        # Expand the smaller frontier
+        side = 0 if len(pq[0]) <= len(pq[1]) else 1
+        current_dist, u = heapq.heappop(pq[side])
+        if u in settled[side]:
+            continue
+        settled[side].add(u)
+
+        for v, weight in weighted_neighbors(graphs[side], u):
+            distance = current_dist + weight
+            if distance < dist[side].get(v, INF):
+                dist[side][v] = distance
+                parent[side][v] = u
+                heapq.heappush(pq[side], (distance, v))
+            # A path through the edge (u, v) joins the two searches
+            if v in dist[1 - side] and distance + dist[1 - side][v] < best:
+                best, meeting = distance + dist[1 - side][v], v
+
+    if meeting is None:
+        return INF, []
+    forward = build_path(parent[0], meeting)
+    backward = build_path(parent[1], meeting)
+    return best, forward + backward[-2::-1]
+
+# Graph shared with the current worker process, attached once by init_worker
+worker_graph = None
+worker_shm = None
+
+def init_worker(descriptor):
+    global worker_graph, worker_shm
+    worker_graph, worker_shm = CSRGraph.from_shared_memory(descriptor)
+
+# Run Dijkstra from each source of a shard inside a worker process
+def dijkstra_shard(sources):
+    return [(src, np.array(dijkstra(worker_graph, src))) for src in sources]
+
+# Dijkstra from many sources at once, sharded across a process pool. The graph is
+# placed in shared memory once instead of being pickled for every task, and
+# (source, distances) rows are yielded as soon as their shard finishes, so the
+# order of the rows is not the order of `sources`.
+def multi_source_dijkstra(graph, sources=None, workers=None, shard_size=16):
+    if not isinstance(graph, CSRGraph):
+        graph = CSRGraph.from_adjacency(graph)
+    if sources is None:
+        sources = range(graph.V)
+    sources = list(sources)
+    workers = workers or os.cpu_count()
+
+    shm, descriptor = graph.to_shared_memory()
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                 initargs=(descriptor,)) as executor:
+            shards = iter(sources[i:i + shard_size] for i in range(0, len(sources), shard_size))
+            # Keep a bounded number of shards in flight so results are streamed
+            # back instead of piling up in memory
+            pending = set()
+            for shard in shards:
+                pending.add(executor.submit(dijkstra_shard, shard))
+                if len(pending) >= 2 * workers:
+                    break
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield from future.result()
+                    shard = next(shards, None)
+                    if shard is not None:
+                        pending.add(executor.submit(dijkstra_shard, shard))
+    finally:
+        shm.close()
+        shm.unlink()
+
+if __name__ == "__main__":
+    # Example graph represented as an adjacency list
+    graph = {
+        0: [(1, 4), (2, 1)],
+        1: [(3, 1)],
+        2: [(1, 2), (3, 5)],
+        3: []
+    }
+
+    # Running the algorithm
+    src_vertex = 0  # Starting from vertex 0
+    print_solution(dijkstra(graph, src_vertex))
+
+    # Compare the priority queue backends
+    for queue in ("lazy", "indexed", "radix"):
+        stats = {}
+        dijkstra(graph, src_vertex, queue=queue, stats=stats)
+        print(queue, stats)
+
+    # Point-to-point queries with early termination
+    for method in ("dijkstra", "bidirectional"):
+        print(method, shortest_path(graph, 0, 3, method=method))
+
+    # All-pairs distances, one row per source, computed in parallel
+    for src, row in sorted(multi_source_dijkstra(graph), key=lambda item: item[0]):
+        print(src, row.tolist())
@@ -1,42 +1,133 @@
-# Number of vertices in the graph
-V = 4
+import numpy as np
+
+from csr_graph import CSRGraph
 
 # Define a large number for representing infinity
 INF = float('inf')
 
-# Floyd-Warshall algorithm
-def floyd_warshall(graph):
-    # Initialize the solution matrix same as input graph matrix
-    dist = list(map(lambda i: list(map(lambda j: j, i)), graph))
-
-    # Adding vertices individually to the set of intermediate vertices
-    for k in range(V):
-        # Pick all vertices as source one by one
-        for i in range(V):
-            # Pick all vertices as destination for the above-picked source
-            for j in range(V):
-                # If vertex k is on the shortest path from i to j, then update the value of dist[i][j]
-                dist[i][j] = min(dist[i][j], dist[i][k] + dist[k][j])
-
-    # Print the shortest distance matrix
-    print_solution(dist)
+# Relax dist[rows, cols] through intermediate vertex k in one vectorized step,
+# keeping the next-hop matrix in sync when one is given
+def relax_through(dist, next_hop, rows, cols, k):
+    block = dist[rows, cols]
+    through_k = dist[rows, k][:, None] + dist[k, cols][None, :]
+
+    if next_hop is None:
+        np.minimum(block, through_k, out=block)
+    else:
+        better = through_k < block
+        block[better] = through_k[better]
+        # Paths that now go through k start with the same hop as the path to k
+        hops = next_hop[rows, cols]
+        hops[better] = np.broadcast_to(next_hop[rows, k][:, None], hops.shape)[better]
+
+# Floyd-Warshall algorithm; graph is an adjacency matrix (INF for no edge) or a CSRGraph.
+# dtype=np.float32 halves the memory of the distance matrix, block_size switches to the
+# cache-blocked variant, and return_next also returns the next-hop matrix for reconstruct_path
+# (always computed with the unblocked loop, whatever block_size says).
+def floyd_warshall(graph, dtype=np.float64, block_size=None, return_next=False):
+    if isinstance(graph, CSRGraph):
+        dist = graph.to_matrix(dtype)
+    else:
+        dist = np.array(graph, dtype=dtype)
+    if dist.ndim != 2 or dist.shape[0] != dist.shape[1]:
+        raise ValueError("adjacency matrix must be square")
+
+    # Number of vertices in the graph
+    V = len(dist)
+
+    next_hop = None
+    if return_next:
+        # The first hop from i to j is j itself when there is a direct edge
+        next_hop = np.where(np.isfinite(dist), np.arange(V, dtype=np.int32), -1).astype(np.int32)
+        np.fill_diagonal(next_hop, np.arange(V, dtype=np.int32))
+
+    everything = slice(None)
+    # The next hops only stay free of cycles (with zero-weight or negative edges) when
+    # the intermediate vertices are added in plain order over the whole matrix, which
+    # the blocked variant does not do, so it only computes distances
+    if block_size is None or block_size >= V or return_next:
+        # Adding vertices individually to the set of intermediate vertices,
+        # updating the whole matrix at once for each of them
+        for k in range(V):
+            relax_through(dist, next_hop, everything, everything, k)
+    else:
+        blocked_floyd_warshall(dist, block_size)
+
+    if return_next:
+        return dist, next_hop
+    return dist
+
+# Tiled Floyd-Warshall: for each block of intermediate vertices, finish the diagonal
+# tile first, then its row and column panels, then every remaining tile. Each tile
+# is small enough to stay in cache while all of its k-steps run.
+def blocked_floyd_warshall(dist, block_size):
+    V = len(dist)
+    blocks = [slice(start, min(start + block_size, V)) for start in range(0, V, block_size)]
+    everything = slice(None)
+
+    for K in blocks:
+        # Phase 1: the diagonal tile only depends on itself
+        for k in range(K.start, K.stop):
+            relax_through(dist, None, K, K, k)
+
+        # Phase 2: the row and column panels only depend on themselves and the diagonal tile
+        for k in range(K.start, K.stop):
+            relax_through(dist, None, K, everything, k)
+            relax_through(dist, None, everything, K, k)
+
+        # Phase 3: every other tile only depends on the finished panels
+        for I in blocks:
+            if I == K:
+                continue
+            for J in blocks:
+                if J == K:
+                    continue
+                for k in range(K.start, K.stop):
+                    relax_through(dist, None, I, J, k)
+
+# Rebuild the shortest path from i to j from the next-hop matrix;
+# returns an empty list if j is unreachable from i
+def reconstruct_path(next_hop, i, j):
+    if next_hop[i][j] == -1:
+        return []
+    path = [i]
+    while i != j:
+        i = int(next_hop[i][j])
+        path.append(i)
+    return path
 
 # A utility function to print the solution
 def print_solution(dist):
+    V = len(dist)
     print("Shortest distances between every pair of vertices:")
     for i in range(V):
         for j in range(V):
             if dist[i][j] == INF:
                 print("INF", end=" ")
             else:
-                print(dist[i][j], end="  ")
+                print(f"{dist[i][j]:.15g}", end="  ")
         print("")
 
-# Example graph (Adjacency matrix representation)
-graph = [[0, 5, INF, 10],
-         [INF, 0, 3, INF],
-         [INF, INF, 0, 1],
-         [INF, INF, INF, 0]]
+if __name__ == "__main__":
+    # Example graph (Adjacency matrix representation)
+    graph = [[0, 5, INF, 10],
+             [INF, 0, 3, INF],
+             [INF, INF, 0, 1],
+             [INF, INF, INF, 0]]
+
+    # Running the algorithm
+    dist, next_hop = floyd_warshall(graph, return_next=True)
+    print_solution(dist)
+    print("Shortest path from 0 to 3:", reconstruct_path(next_hop, 0, 3))
 
-# Running the algorithm
-floyd_warshall(graph)
+    # Zero-weight edges: the next hops must still lead to the target, even when a
+    # block size is given
+    graph = [[0, 2, 0, INF, INF],
+             [6, 0, 2, 1, INF],
+             [0, 4, 0, INF, INF],
+             [INF, INF, INF, 0, 7],
+             [8, 2, INF, INF, 0]]
+    dist, next_hop = floyd_warshall(graph, block_size=2, return_next=True)
+    path = reconstruct_path(next_hop, 0, 4)
+    assert path[-1] == 4 and sum(graph[u][v] for u, v in zip(path, path[1:])) == dist[0][4]
+    print("Shortest path from 0 to 4 with zero-weight edges:", path)
@@ -0,0 +1,148 @@
+import heapq
+
+# Priority queues for Dijkstra's algorithm. They all share one interface:
+#   push(vertex, key) - insert vertex, or lower its key if it is already queued
+#   pop()             - remove and return (key, vertex) with the smallest key, or None when empty
+#   stats             - instrumentation counters for comparing backends on a workload
+
+
+def new_stats():
+    return {"pushes": 0, "pops": 0, "stale_pops": 0, "decrease_keys": 0, "peak_size": 0}
+
+
+# Binary heap with lazy deletion: a decrease-key pushes a duplicate entry and the
+# outdated one is skipped when it reaches the top. Simple, but the heap can grow to O(E).
+class LazyHeap:
+    def __init__(self, vertices):
+        self.heap = []
+        self.key = {}  # Latest key of every vertex still waiting in the queue
+        self.stats = new_stats()
+
+    def push(self, vertex, key):
+        if vertex in self.key:
+            self.stats["decrease_keys"] += 1
+        self.key[vertex] = key
+        heapq.heappush(self.heap, (key, vertex))
+        self.stats["pushes"] += 1
+        self.stats["peak_size"] = max(self.stats["peak_size"], len(self.heap))
+
+    def pop(self):
+        while self.heap:
+            key, vertex = heapq.heappop(self.heap)
+            # Skip entries superseded by a later push or already popped
+            if self.key.get(vertex) != key:
+                self.stats["stale_pops"] += 1
+                continue
+            del self.key[vertex]
+            self.stats["pops"] += 1
+            return key, vertex
+        return None
+
+
+# Binary heap with a position index, so decrease-key moves the existing entry up
+# instead of adding a new one. The heap never holds more than V entries.
+class IndexedHeap:
+    def __init__(self, vertices):
+        self.keys = []
+        self.vertices = []
+        self.position = [-1] * vertices  # Heap slot of every queued vertex
+        self.stats = new_stats()
+
+    def push(self, vertex, key):
+        i = self.position[vertex]
+        if i == -1:
+            i = len(self.keys)
+            self.keys.append(key)
+            self.vertices.append(vertex)
+            self.position[vertex] = i
+            self.stats["pushes"] += 1
+            self.stats["peak_size"] = max(self.stats["peak_size"], len(self.keys))
+        elif key < self.keys[i]:
+            self.keys[i] = key
+            self.stats["decrease_keys"] += 1
+        else:
+            return
+        self.sift_up(i)
+
+    def pop(self):
+        if not self.keys:
+            return None
+        key, vertex = self.keys[0], self.vertices[0]
+        self.position[vertex] = -1
+        last_key, last_vertex = self.keys.pop(), self.vertices.pop()
+        if self.keys:
+            self.keys[0], self.vertices[0] = last_key, last_vertex
+            self.position[last_vertex] = 0
+            self.sift_down(0)
+        self.stats["pops"] += 1
+        return key, vertex
+
+    def sift_up(self, i):
+        keys, vertices, position = self.keys, self.vertices, self.position
+        key, vertex = keys[i], vertices[i]
+        while i > 0:
+            parent = (i - 1) >> 1
+            if keys[parent] <= key:
+                break
+            keys[i], vertices[i] = keys[parent], vertices[parent]
+            position[vertices[i]] = i
+            i = parent
+        keys[i], vertices[i] = key, vertex
+        position[vertex] = i
+
+    def sift_down(self, i):
+        keys, vertices, position = self.keys, self.vertices, self.position
+        key, vertex = keys[i], vertices[i]
+        size = len(keys)
+        while True:
+            child = 2 * i + 1
+            if child >= size:
+                break
+            if child + 1 < size and keys[child + 1] < keys[child]:
+                child += 1
+            if key <= keys[child]:
+                break
+            keys[i], vertices[i] = keys[child], vertices[child]
+            position[vertices[i]] = i
+            i = child
+        keys[i], vertices[i] = key, vertex
+        position[vertex] = i
+
+
+# Bucket queue for Dial's algorithm. With non-negative integer weights of at most
+# max_weight, every queued key lies within max_weight of the current minimum, so
+# max_weight + 1 circular buckets are enough and push/pop take O(1) plus the scan
+# over empty buckets. Decrease-key is lazy, as in LazyHeap.
+class BucketQueue:
+    def __init__(self, vertices, max_weight):
+        self.buckets = [[] for _ in range(max_weight + 1)]
+        self.key = {}  # Latest key of every vertex still waiting in the queue
+        self.current = 0  # Smallest key that may still be queued
+        self.size = 0  # Entries in the buckets, including stale ones
+        self.stats = new_stats()
+
+    def push(self, vertex, key):
+        if vertex in self.key:
+            self.stats["decrease_keys"] += 1
+        self.key[vertex] = key
+        self.buckets[int(key) % len(self.buckets)].append(vertex)
+        self.size += 1
+        self.stats["pushes"] += 1
+        self.stats["peak_size"] = max(self.stats["peak_size"], self.size)
+
+    def pop(self):
+        buckets = self.buckets
+        while self.size:
+            bucket = buckets[self.current % len(buckets)]
+            while bucket:
+                vertex = bucket.pop()
+                self.size -= 1
+                # Skip entries superseded by a later push or already popped
+                if self.key.get(vertex) != self.current:
+                    self.stats["stale_pops"] += 1
+                    continue
+                del self.key[vertex]
+                self.stats["pops"] += 1
+                return self.current, vertex
+            self.current += 1
+        return None
@@ -1,48 +1,154 @@
 from collections import defaultdict
 
+from csr_graph import BLACK, GREY, WHITE, CSRBackedGraph
+
+# Raised when a graph has no topological order; .cycle holds the offending cycle
+class CycleError(ValueError):
+    def __init__(self, cycle):
+        super().__init__(f"graph contains a cycle: {cycle}")
+        self.cycle = cycle
+
 # Graph class for DFS-based Topological Sort
-class Graph:
+class Graph(CSRBackedGraph):
     def __init__(self, vertices):
         self.graph = defaultdict(list)  # Default dictionary to store the graph
         self.V = vertices               # Number of vertices
 
-    # Function to add an edge to the graph
-    def add_edge(self, u, v):
-        self.graph[u].append(v)
+    # Topological Sort with an iterative DFS, so deep graphs cannot hit the recursion
+    # limit. Returns the ordering, or raises CycleError carrying the cycle found.
+    def topological_sort(self):
+        # WHITE: not visited yet, GREY: on the current DFS path, BLACK: finished
+        state = bytearray(self.V)
+        # Vertices in the order they finish; reversed at the end
+        finished = []
+
+        for start in range(self.V):
+            if state[start] != WHITE:
+                continue
 
-    # Recursive helper function for DFS
-    def topological_sort_util(self, v, visited, stack):
-        visited[v] = True
+            # Explicit stack of (vertex, iterator over its neighbors), plus the DFS path itself
+            state[start] = GREY
+            stack = [(start, iter(self.neighbors(start)))]
+            path = [start]
+            while stack:
+                v, neighbors = stack[-1]
+                for neighbor in neighbors:
+                    if state[neighbor] == WHITE:
+                        state[neighbor] = GREY
+                        stack.append((neighbor, iter(self.neighbors(neighbor))))
+                        path.append(neighbor)
+                        break
+                    # An edge back into the current path means no ordering exists
+                    if state[neighbor] == GREY:
+                        raise CycleError(path[path.index(neighbor):])
+                else:
+                    # A vertex finishes after everything reachable from it
+                    state[v] = BLACK
+                    finished.append(v)
+                    stack.pop()
+                    path.pop()
 
-        # Recur for all the vertices adjacent to this vertex
-        for neighbor in self.graph[v]:
-            if not visited[neighbor]:
-                self.topological_sort_util(neighbor, visited, stack)
+        # Return the reverse of the finishing order to get the topological ordering
+        finished.reverse()
+        return finished
+
+# Graph that keeps a topological order up to date as edges are added, using the
+# Pearce-Kelly algorithm. An insert only reorders the vertices whose positions lie
+# between the two endpoints and are connected to them, instead of sorting again.
+class DynamicGraph(Graph):
+    def __init__(self, vertices):
+        super().__init__(vertices)
+        self.reverse = defaultdict(list)          # Incoming edges, for the backward search
+        self.position = list(range(vertices))     # Position of every vertex in the order
+        self.vertex_at = list(range(vertices))    # Vertex at every position
 
-        # Push the current vertex to the stack which stores the topological sort
-        stack.append(v)
+    # Start from the edges of a CSRGraph. Unlike Graph.from_csr the edges are copied,
+    # since this graph keeps growing, and the initial order comes from one DFS
+    # topological sort instead of a reorder per edge. Raises CycleError if csr has a cycle.
+    @classmethod
+    def from_csr(cls, csr):
+        g = cls(csr.V)
+        g.vertex_at = Graph.from_csr(csr).topological_sort()
+        for i, v in enumerate(g.vertex_at):
+            g.position[v] = i
+        for u, v in zip(csr.edge_sources().tolist(), csr.targets.tolist()):
+            g.graph[u].append(v)
+            g.reverse[v].append(u)
+        return g
 
-    # Main function to perform Topological Sort
+    # Add the edge u -> v, reordering locally if v currently comes before u.
+    # Raises CycleError, leaving the graph unchanged, if the edge would close a cycle.
+    def add_edge(self, u, v):
+        lower, upper = self.position[v], self.position[u]
+        if lower < upper:
+            # Everything reachable from v that sits no later than u must move after u,
+            # and everything reaching u that sits no earlier than v must move before v
+            forward = self.affected(v, self.neighbors, lambda p: p <= upper, target=u)
+            backward = self.affected(u, self.predecessors, lambda p: p >= lower)
+            self.reorder(backward, forward)
+        elif u == v:
+            raise CycleError([u])
+
+        self.graph[u].append(v)
+        self.reverse[v].append(u)
+
+    # Current topological order
     def topological_sort(self):
-        visited = [False] * self.V
-        stack = []
+        return list(self.vertex_at)
 
-        # Call the helper function for all vertices not yet visited
-        for i in range(self.V):
-            if not visited[i]:
-                self.topological_sort_util(i, visited, stack)
+    def predecessors(self, v):
+        return self.reverse[v] if v in self.reverse else ()
 
-        # Return the reverse of the stack to get the topological ordering
-        print(stack[::-1])
+    # Iterative DFS from start over edges(vertex), visiting only vertices whose position
+    # satisfies in_region. Reaching target means the new edge would close a cycle.
+    def affected(self, start, edges, in_region, target=None):
+        parent = {start: None}
+        stack = [start]
+        while stack:
+            x = stack.pop()
+            for y in edges(x):
+                if y == target:
+                    # Cycle: target -> start ... x -> target
+                    cycle = [x]
+                    while parent[cycle[-1]] is not None:
+                        cycle.append(parent[cycle[-1]])
+                    cycle.reverse()
+                    raise CycleError([target] + cycle)
+                if y not in parent and in_region(self.position[y]):
+                    parent[y] = x
+                    stack.append(y)
+        return list(parent)
+
+    # Give the backward set the lowest of the freed positions and the forward set
+    # the highest, keeping the relative order inside each set
+    def reorder(self, backward, forward):
+        backward.sort(key=self.position.__getitem__)
+        forward.sort(key=self.position.__getitem__)
+        vertices = backward + forward
+        slots = sorted(self.position[x] for x in vertices)
+        for x, slot in zip(vertices, slots):
+            self.position[x] = slot
+            self.vertex_at[slot] = x
 
 # Example usage
-g = Graph(6)
-g.add_edge(5, 2)
-g.add_edge(5, 0)
-g.add_edge(4, 0)
-g.add_edge(4, 1)
-g.add_edge(2, 3)
-g.add_edge(3, 1)
-
-print("Topological Sort of the given graph:")
-g.topological_sort()
+if __name__ == "__main__":
+    g = Graph(6)
+    g.add_edge(5, 2)
+    g.add_edge(5, 0)
+    g.add_edge(4, 0)
+    g.add_edge(4, 1)
+    g.add_edge(2, 3)
+    g.add_edge(3, 1)
+
+    print("Topological Sort of the given graph:")
+    print(g.topological_sort())
+
+    # The same graph, keeping the order up to date after every insert
+    dg = DynamicGraph(6)
+    for u, v in [(5, 2), (5, 0), (4, 0), (4, 1), (2, 3), (3, 1)]:
+        dg.add_edge(u, v)
+        print(f"after {u} -> {v}:", dg.topological_sort())
+    try:
+        dg.add_edge(1, 5)
+    except CycleError as error:
+        print("rejected 1 -> 5:", error.cycle)
@@ -1,36 +1,414 @@
-def knapsack_01(values, weights, capacity):
-    # the classic 0/1 knapsack problem, solved by using dynamic programming techniques
+import bisect
+
+import numpy as np
+
+def value_dtype(values):
+    # integer values keep exact integer arithmetic, anything else is solved in floating point
+    return np.int64 if all(float(v).is_integer() for v in values) else np.float64
+
+def integer_weights(weights):
+    # the DP rows are indexed by weight, so the weights must be integers; integer-valued
+    # floats such as 2.0 are accepted and converted
+    if all(isinstance(w, (int, np.integer)) for w in weights):
+        return weights
+    if not all(float(w).is_integer() for w in weights):
+        raise ValueError("the DP needs integer weights")
+    return [int(w) for w in weights]
+
+def knapsack_row(values, weights, capacity, items=None, keep=None):
+    # one rolling row of the 0/1 DP table: row[j] is the best value with total weight at most j.
+    # Each item is a single vectorized step; the right-hand side is computed before the
+    # write, so it still holds the previous row and no item is used twice.
+    # If a keep list is given, a packed bitset per item is appended to it, with bit j set
+    # when taking the item improved row[j]; that is enough to reconstruct any capacity.
+    opt = np.zeros(capacity+1, dtype=value_dtype(values))
+    for i in (range(len(values)) if items is None else items):
+        w = weights[i]
+        if w > capacity:
+            if keep is not None:
+                keep.append(np.packbits(np.zeros(capacity+1, dtype=bool)))
+            continue
+        with_item = opt[:capacity+1-w]+values[i]
+        if keep is not None:
+            take = np.zeros(capacity+1, dtype=bool)
+            take[w:] = with_item > opt[w:]
+            keep.append(np.packbits(take))
+        np.maximum(opt[w:], with_item, out=opt[w:])
+    return opt
+
+def unbounded_row(values, weights, capacity, choice=None):
+    # rolling row for unlimited copies: row[j] is the best value with total weight at most j.
+    # Shifting by 1, 2, 4, ... copies of an item in turn allows any number of copies in
+    # O(log(capacity / weight)) vectorized steps per item.
+    # If a choice array is given, choice[j] is set to the last item that improved row[j]
+    # (-1 if none); following it back from any j rebuilds an optimal multiset.
+    opt = np.zeros(capacity+1, dtype=value_dtype(values))
+    for i in range(len(values)):
+        w, v = weights[i], values[i]
+        if w > capacity or v <= 0:
+            continue
+        if w == 0:
+            raise ValueError("an item with weight 0 and positive value has no bounded optimum")
+        copies = 1
+        while copies*w <= capacity:
+            shift = copies*w
+            with_items = opt[:capacity+1-shift]+copies*v
+            if choice is not None:
+                choice[shift:][with_items > opt[shift:]] = i
+            np.maximum(opt[shift:], with_items, out=opt[shift:])
+            copies *= 2
+    return opt
+
+# largest n*capacity table the "auto" method still solves with the DP
+DP_CELL_LIMIT = 5*10**8
+# branch-and-bound visits about a million nodes a second; in the time of one node the DP
+# fills about 1000 table cells and meet-in-the-middle about 50 (subset, item) pairs
+# (measured with knapsack_benchmark.py)
+DP_CELLS_PER_NODE = 1000
+SUBSET_ITEMS_PER_NODE = 50
+
+def auto_fallback(values, weights, capacity):
+    # "auto" runs branch-and-bound first: it is the fastest backend on most inputs, but
+    # strongly correlated ones (value close to weight plus a constant) can blow it up.
+    # Returns the exact backend to fall back to, with the number of branch-and-bound nodes
+    # that cost about as much as running it; (None, "branch_and_bound") if there is none.
     n = len(values)
-    opt = [[0]*(capacity+1) for _ in range(n+1)]
+    options = []
+    if all(float(w).is_integer() for w in weights) and n*(int(capacity)+1) <= DP_CELL_LIMIT:
+        options.append((n*(int(capacity)+1)//DP_CELLS_PER_NODE, "dp"))
+    if n <= 40:
+        options.append((2**(n//2)*n//SUBSET_ITEMS_PER_NODE, "meet_in_middle"))
+    return min(options, default=(None, "branch_and_bound"))
 
-    for i in range(1,n+1):
-        for j in range(1,capacity+1):
-            if weights[i-1] <= j:
-                opt[i][j] = max(opt[i-1][j],opt[i-1][j-weights[i-1]]+values[i-1])
-            else:
-                opt[i][j] = opt[i-1][j]
+def knapsack_01(values, weights, capacity, method="auto", epsilon=0.1):
+    # the classic 0/1 knapsack problem. method picks the solver backend:
+    #   "dp"               - dynamic programming over one rolling row; O(n * capacity), integer weights
+    #   "branch_and_bound" - depth-first search pruned by the fractional (greedy) bound
+    #   "meet_in_middle"   - enumerate both halves of the items; O(2^(n/2) * n), for n <= 40
+    #   "fptas"            - value-scaling approximation, at least (1 - epsilon) * optimum
+    #   "auto"             - branch-and-bound, switching to the DP or meet-in-the-middle
+    #                        once it has cost about as much as they would (see auto_fallback)
+    if method == "auto":
+        node_limit, method = auto_fallback(values, weights, capacity)
+        chosen = branch_and_bound_items(values, weights, capacity, node_limit)
+        if chosen is not None:
+            return sum(values[i] for i in chosen)
+    if method == "dp":
+        # Only one row of the table is kept, so memory is O(capacity) instead of O(n * capacity)
+        return knapsack_row(values, integer_weights(weights), int(capacity))[int(capacity)].item()
+    return knapsack_01_items(values, weights, capacity, method, epsilon)[0]
+
+def knapsack_01_items(values, weights, capacity, method="auto", epsilon=0.1):
+    # 0/1 knapsack that also returns the chosen item indices: (best value, items).
+    # method selects the backend as in knapsack_01.
+    if method == "auto":
+        node_limit, method = auto_fallback(values, weights, capacity)
+        chosen = branch_and_bound_items(values, weights, capacity, node_limit)
+        if chosen is not None:
+            return sum(values[i] for i in chosen), sorted(chosen)
+    if method == "dp":
+        chosen = hirschberg_items(values, integer_weights(weights), int(capacity))
+    elif method == "branch_and_bound":
+        chosen = branch_and_bound_items(values, weights, capacity)
+    elif method == "meet_in_middle":
+        chosen = meet_in_middle_items(values, weights, capacity)
+    elif method == "fptas":
+        chosen = fptas_items(values, weights, capacity, epsilon)
+    else:
+        raise ValueError(f"unknown knapsack method: {method!r}")
+    return sum(values[i] for i in chosen), sorted(chosen)
+
+def hirschberg_items(values, weights, capacity):
+    # chosen items in O(capacity) memory. Hirschberg-style divide and conquer: solve each
+    # half of the items with a rolling row, pick the capacity split that maximizes the
+    # sum, and recurse into both halves.
+    def solve(items, capacity):
+        if len(items) == 1:
+            i = items[0]
+            return [i] if weights[i] <= capacity and values[i] > 0 else []
+        mid = len(items)//2
+        left = knapsack_row(values, weights, capacity, items[:mid])
+        right = knapsack_row(values, weights, capacity, items[mid:])
+        split = int(np.argmax(left+right[::-1]))
+        return solve(items[:mid], split)+solve(items[mid:], capacity-split)
+
+    return solve(list(range(len(values))), capacity) if len(values) else []
+
+def useful_items(values, weights, capacity):
+    # items that fit and add value; weight-0 items are always worth taking
+    free = [i for i in range(len(values)) if weights[i] == 0 and values[i] > 0]
+    rest = [i for i in range(len(values)) if 0 < weights[i] <= capacity and values[i] > 0]
+    return free, rest
+
+def branch_and_bound_items(values, weights, capacity, node_limit=None):
+    # depth-first branch-and-bound over the items sorted by value per unit weight. A branch
+    # is cut when even filling the remaining capacity greedily with fractions of items
+    # (the LP relaxation) cannot beat the best solution found so far. With a node_limit
+    # the search gives up and returns None after visiting that many nodes.
+    free, rest = useful_items(values, weights, capacity)
+    rest.sort(key=lambda i: values[i]/weights[i], reverse=True)
+    w = [weights[i] for i in rest]
+    v = [values[i] for i in rest]
+    n = len(rest)
+    prefix_w, prefix_v = [0], [0]
+    for i in range(n):
+        prefix_w.append(prefix_w[-1]+w[i])
+        prefix_v.append(prefix_v[-1]+v[i])
+
+    def bound(k, room, value):
+        # whole items k..j-1 fit, then a fraction of item j
+        j = bisect.bisect_right(prefix_w, prefix_w[k]+room, k)-1
+        value += prefix_v[j]-prefix_v[k]
+        if j < n:
+            value += v[j]*(room-(prefix_w[j]-prefix_w[k]))/w[j]
+        return value
+
+    best_value, best_chosen = 0, None
+    # stack of (next item, remaining capacity, value so far, chosen items as a linked list)
+    stack = [(0, capacity, 0, None)]
+    nodes = 0
+    while stack:
+        nodes += 1
+        if node_limit is not None and nodes > node_limit:
+            return None
+        k, room, value, chosen = stack.pop()
+        if value > best_value:
+            best_value, best_chosen = value, chosen
+        if k == n or bound(k, room, value) <= best_value:
+            continue
+        stack.append((k+1, room, value, chosen))
+        # explore taking the item first: it follows the greedy order and finds good
+        # solutions early, which makes the bound cut more
+        if w[k] <= room:
+            stack.append((k+1, room-w[k], value+v[k], (k, chosen)))
+
+    chosen = []
+    while best_chosen is not None:
+        k, best_chosen = best_chosen
+        chosen.append(rest[k])
+    return free+chosen
+
+def subset_table(weights, values):
+    # total weight and value of every subset; bit k of a subset's index says whether item k is in it
+    total_w, total_v = np.zeros(1), np.zeros(1)
+    for w, v in zip(weights, values):
+        total_w = np.concatenate([total_w, total_w+w])
+        total_v = np.concatenate([total_v, total_v+v])
+    return total_w, total_v
+
+def meet_in_middle_items(values, weights, capacity):
+    # enumerate all subsets of each half of the items, then for every subset of the first
+    # half find the best subset of the second half that still fits, with one sorted search
+    free, rest = useful_items(values, weights, capacity)
+    if len(rest) > 40:
+        raise ValueError("meet-in-the-middle is limited to 40 items")
+    first, second = rest[:len(rest)//2], rest[len(rest)//2:]
+    w1, v1 = subset_table([weights[i] for i in first], [values[i] for i in first])
+    w2, v2 = subset_table([weights[i] for i in second], [values[i] for i in second])
+
+    # second half sorted by weight, with the best value (and its subset) at or below each weight
+    order = np.argsort(w2, kind="stable")
+    w2, v2 = w2[order], v2[order]
+    best_v2 = np.maximum.accumulate(v2)
+    best_at = np.maximum.accumulate(np.where(v2 >= best_v2, np.arange(len(v2)), 0))
 
-    return opt[n][capacity]
+    fits = w1 <= capacity
+    j = np.searchsorted(w2, capacity-w1, side="right")-1
+    totals = np.where(fits, v1+best_v2[np.maximum(j, 0)], -np.inf)
+    a = int(np.argmax(totals))
+    b = int(order[best_at[j[a]]])
+    chosen = [first[k] for k in range(len(first)) if a >> k & 1]
+    chosen += [second[k] for k in range(len(second)) if b >> k & 1]
+    return free+chosen
+
+def fptas_items(values, weights, capacity, epsilon):
+    # fully polynomial-time approximation scheme: round every value down to a multiple of
+    # K = epsilon * max value / n, then run the exact DP over (scaled) values that finds the
+    # lightest subset for every value. The result is at least (1 - epsilon) * optimum and
+    # takes O(n^2 / epsilon) time whatever the weights and capacity.
+    if not 0 < epsilon < 1:
+        raise ValueError("epsilon must be between 0 and 1")
+    free, rest = useful_items(values, weights, capacity)
+    if not rest:
+        return free
+    scale = epsilon*max(values[i] for i in rest)/len(rest)
+    scaled = [int(values[i]//scale) for i in rest]
+    total = sum(scaled)
+
+    # lightest[p]: smallest total weight of a subset with scaled value exactly p
+    lightest = np.full(total+1, np.inf)
+    lightest[0] = 0
+    keep = []
+    for k, p in enumerate(scaled):
+        with_item = lightest[:total+1-p]+weights[rest[k]]
+        take = np.zeros(total+1, dtype=bool)
+        take[p:] = with_item < lightest[p:]
+        keep.append(np.packbits(take))
+        np.minimum(lightest[p:], with_item, out=lightest[p:])
+
+    p = int(np.flatnonzero(lightest <= capacity)[-1])
+    chosen = []
+    for k in range(len(rest)-1, -1, -1):
+        if keep[k][p >> 3] >> (7-(p & 7)) & 1:
+            chosen.append(rest[k])
+            p -= scaled[k]
+    return free+chosen
+
+def subset_sums(weights, capacity):
+    # every total weight up to capacity that some subset of the items adds up to, as a
+    # bitset: bit j of the result is set if j is reachable. One shift-or per item.
+    mask = (1 << (capacity+1))-1
+    reachable = 1
+    for w in weights:
+        reachable |= (reachable << w) & mask
+    return reachable
+
+def subset_sum(weights, target):
+    # is there a subset of the items whose weights add up to exactly target?
+    return target >= 0 and bool(subset_sums(weights, target) >> target & 1)
 
 def unbounded_knapsack(values, weights, capacity):
     # a version of the knapsack problem which considers unlimited supplies for each item
-    n = len(values)
-    opt = [0]*(capacity+1)
+    return unbounded_row(values, integer_weights(weights), capacity)[capacity].item()
+
+def split_counts(counts):
+    # binary splitting: up to count copies of an item become bundles of 1, 2, 4, ... copies
+    # plus a remainder, so every number of copies from 0 to count is a subset of the bundles.
+    # Returns (item, copies) pairs; a bounded item then costs O(log count) 0/1 steps.
+    bundles = []
+    for i, count in enumerate(counts):
+        if count < 0:
+            raise ValueError("item counts must be non-negative")
+        copies = 1
+        while count > 0:
+            take = min(copies, count)
+            bundles.append((i, take))
+            count -= take
+            copies *= 2
+    return bundles
+
+def bounded_knapsack(values, weights, counts, capacity):
+    # knapsack where item i may be taken up to counts[i] times, solved as 0/1 knapsack
+    # over the bundles from split_counts with one rolling row
+    weights = integer_weights(weights)
+    bundles = split_counts(counts)
+    bundle_values = [values[i]*copies for i, copies in bundles]
+    bundle_weights = [weights[i]*copies for i, copies in bundles]
+    return knapsack_row(bundle_values, bundle_weights, capacity)[capacity].item()
+
+def bounded_knapsack_items(values, weights, counts, capacity):
+    # bounded knapsack that also returns how many copies of each item are taken:
+    # (best value, copies). Like bounded_knapsack, but keeps a packed keep-bit per bundle
+    # and capacity for the reconstruction.
+    weights = integer_weights(weights)
+    bundles = split_counts(counts)
+    bundle_values = [values[i]*copies for i, copies in bundles]
+    bundle_weights = [weights[i]*copies for i, copies in bundles]
+    keep = []
+    opt = knapsack_row(bundle_values, bundle_weights, capacity, keep=keep)
+
+    taken = [0]*len(values)
+    j = capacity
+    for b in range(len(bundles)-1, -1, -1):
+        if keep[b][j >> 3] >> (7-(j & 7)) & 1:
+            i, copies = bundles[b]
+            taken[i] += copies
+            j -= bundle_weights[b]
+    return opt[capacity].item(), taken
+
+def knapsack_2d(values, weights, volumes, capacity, volume_capacity, counts=None):
+    # knapsack with two constraints: total weight at most capacity and total volume at most
+    # volume_capacity. The rolling table opt[j, k] is the best value within weight j and
+    # volume k; each item is one vectorized step that shifts the table by (weight, volume).
+    # counts allows up to counts[i] copies of item i, using the same binary splitting as
+    # bounded_knapsack; without it every item is used at most once.
+    # Memory is O(capacity * volume_capacity) whatever the number of items.
+    weights, volumes = integer_weights(weights), integer_weights(volumes)
+    if counts is None:
+        counts = [1]*len(values)
+    opt = np.zeros((capacity+1, volume_capacity+1), dtype=value_dtype(values))
+    for i, copies in split_counts(counts):
+        w, u = weights[i]*copies, volumes[i]*copies
+        if w > capacity or u > volume_capacity:
+            continue
+        with_item = opt[:capacity+1-w, :volume_capacity+1-u]+values[i]*copies
+        np.maximum(opt[w:, u:], with_item, out=opt[w:, u:])
+    return opt[capacity, volume_capacity].item()
+
+class KnapsackSolver:
+    # solves a set of items once up to max_capacity, then answers the best value and the
+    # chosen items for any capacity up to it. Value queries are O(1) lookups in the DP row;
+    # item queries follow the stored decisions in O(n) and are cached.
+    #   0/1 items:       one packed keep-bit per item and capacity (n * capacity / 8 bytes)
+    #   unbounded items: one int32 choice per capacity
+    def __init__(self, values, weights, max_capacity, unbounded=False):
+        self.values = list(values)
+        self.weights = integer_weights(list(weights))
+        self.max_capacity = max_capacity
+        self.unbounded = unbounded
+        self.cache = {}
+        if unbounded:
+            self.choice = np.full(max_capacity+1, -1, dtype=np.int32)
+            self.opt = unbounded_row(self.values, self.weights, max_capacity, self.choice)
+        else:
+            self.keep = []
+            self.opt = knapsack_row(self.values, self.weights, max_capacity, keep=self.keep)
+
+    def check(self, capacity):
+        if not 0 <= capacity <= self.max_capacity:
+            raise ValueError(f"capacity must be between 0 and {self.max_capacity}")
+
+    def value(self, capacity):
+        # best total value with total weight at most capacity
+        self.check(capacity)
+        return self.opt[capacity].item()
+
+    def items(self, capacity):
+        # indices of the items in an optimal selection (repeated for multiple copies)
+        self.check(capacity)
+        if capacity not in self.cache:
+            chosen = []
+            j = capacity
+            if self.unbounded:
+                while self.choice[j] != -1:
+                    i = int(self.choice[j])
+                    chosen.append(i)
+                    j -= self.weights[i]
+            else:
+                # walk the items backwards, as in the classic table reconstruction
+                for i in range(len(self.values)-1, -1, -1):
+                    if self.keep[i][j >> 3] >> (7-(j & 7)) & 1:
+                        chosen.append(i)
+                        j -= self.weights[i]
+            chosen.reverse()
+            self.cache[capacity] = chosen
+        return list(self.cache[capacity])
+
+if __name__ == "__main__":
+    weights = [3,5,1,2,6]
+    values = [4,8,3,2,5]
+    capacity = 10
+
+    solution_01 = knapsack_01(weights=weights, values=values, capacity=capacity)
+    print(f"Maximum value (0/1 knapsack): {solution_01}")
 
-    for j in range(capacity+1):
-        for i in range(n):
-            if weights[i]<=j:
-                opt[j] = max(opt[j], opt[j-weights[i]]+values[i])
+    best, chosen = knapsack_01_items(weights=weights, values=values, capacity=capacity)
+    print(f"Items chosen (0/1 knapsack): {chosen}, total value {best}")
 
-    return opt[capacity]
+    print(f"Some items weigh exactly 12: {subset_sum(weights, 12)}")
 
-weights = [3,5,1,2,6]
-values = [4,8,3,2,5]
-capacity = 10
+    solution_unbounded = unbounded_knapsack(weights=weights, values=values, capacity=capacity)
+    print(f"Maximum value (unbounded knapsack): {solution_unbounded}")
 
-solution_01 = knapsack_01(weights=weights, values=values, capacity=capacity)
-print(f"Maximum value (0/1 knapsack): {solution_01}")
+    counts = [2,1,4,3,1]
+    best, taken = bounded_knapsack_items(values, weights, counts, capacity)
+    print(f"Copies taken (bounded knapsack): {taken}, total value {best}")
 
-solution_unbounded = unbounded_knapsack(weights=weights, values=values, capacity=capacity)
-print(f"Maximum value (unbounded knapsack): {solution_unbounded}")
+    volumes = [2,4,1,3,2]
+    solution_2d = knapsack_2d(values, weights, volumes, capacity, volume_capacity=6)
+    print(f"Maximum value (weight and volume limits): {solution_2d}")
 
+    # many capacities, one solve
+    solver = KnapsackSolver(values, weights, max_capacity=capacity)
+    for c in range(0, capacity+1, 5):
+        print(f"capacity {c}: value {solver.value(c)}, items {solver.items(c)}")
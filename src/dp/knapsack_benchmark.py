@@ -0,0 +1,74 @@
+import argparse
+import random
+import time
+
+from knapsack import knapsack_01
+
+# Compares the 0/1 knapsack backends on random instances of a few shapes.
+# Usage: python knapsack_benchmark.py [--repeat 3] [--seed 0]
+
+METHODS = ["dp", "branch_and_bound", "meet_in_middle", "fptas", "auto"]
+
+def make_instance(rng, n, max_weight, correlation):
+    # the more a value follows its weight, the harder the instance is for branch-and-bound:
+    # "weak" puts values near the weights, "strong" at the weight plus a constant
+    weights = [rng.randint(1, max_weight) for _ in range(n)]
+    if correlation == "weak":
+        values = [max(1, w+rng.randint(-max_weight//10, max_weight//10)) for w in weights]
+    elif correlation == "strong":
+        values = [w+max_weight//10 for w in weights]
+    else:
+        values = [rng.randint(1, max_weight) for _ in range(n)]
+    return values, weights, sum(weights)//2
+
+# (name, n, max weight, correlation); runnable() skips backends that cannot handle the shape
+# in reasonable time: the DP is pseudo-polynomial in capacity, meet-in-the-middle needs n <= 40
+# and the FPTAS table grows with n**2/epsilon
+CASES = [
+    ("small n, small weights", 30, 1000, None),
+    ("small n, huge weights", 36, 10**9, None),
+    ("medium n, small weights", 200, 1000, "weak"),
+    ("strongly correlated", 60, 1000, "strong"),
+    ("large n, huge weights", 1000, 10**9, None),
+]
+
+def runnable(method, n, max_weight):
+    if method == "dp":
+        return n*n*max_weight//2 <= 5*10**8
+    if method == "meet_in_middle":
+        return n <= 40
+    if method == "fptas":
+        return n <= 200
+    return True
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the 0/1 knapsack backends")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    print(f"{'case':<26}" + "".join(f"{m:>18}" for m in METHODS))
+    for name, n, max_weight, correlation in CASES:
+        instances = [make_instance(rng, n, max_weight, correlation) for _ in range(args.repeat)]
+        row = f"{name:<26}"
+        exact = None
+        for method in METHODS:
+            if not runnable(method, n, max_weight):
+                row += f"{'-':>18}"
+                continue
+            start = time.perf_counter()
+            results = [knapsack_01(v, w, c, method=method) for v, w, c in instances]
+            elapsed = (time.perf_counter()-start)/len(instances)
+            if method != "fptas":
+                # every exact backend has to agree
+                assert exact is None or results == exact, f"{method} disagrees on {name}"
+                exact = results
+                row += f"{elapsed*1000:>16.1f}ms"
+            else:
+                gap = max(1-r/e for r, e in zip(results, exact)) if exact else 0
+                row += f"{elapsed*1000:>9.1f}ms ({gap:.1%})"
+        print(row)
+
+if __name__ == "__main__":
+    main()